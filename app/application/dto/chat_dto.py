@@ -1,12 +1,31 @@
 """Chat DTOs."""
 
 from datetime import datetime
+from typing import Any
+from uuid import UUID
+
 from pydantic import BaseModel, Field
 
+from app.domain.interfaces.retriever_service import RetrievalFilter
+
 
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, description="Pesan dari user")
     session_id: str | None = Field(None, description="Session ID untuk history")
+    document_ids: list[UUID] | None = Field(
+        None, description="Batasi retrieval ke dokumen-dokumen ini"
+    )
+    metadata_filter: dict[str, Any] | None = Field(
+        None, description='Metadata chunk yang harus cocok, mis. {"document_filename": "a.pdf"}'
+    )
+
+    def to_filter(self) -> RetrievalFilter | None:
+        if self.document_ids is None and not self.metadata_filter:
+            return None
+        return RetrievalFilter(
+            document_ids=tuple(self.document_ids) if self.document_ids is not None else None,
+            metadata=self.metadata_filter or None,
+        )
 
 
 class ChatResponse(BaseModel):
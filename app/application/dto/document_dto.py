@@ -24,3 +24,4 @@ class DocumentResponse(BaseModel):
 class DocumentListResponse(BaseModel):
     documents: list[DocumentResponse]
     total: int
+    next_cursor: str | None = Field(None, description="Cursor halaman berikutnya")
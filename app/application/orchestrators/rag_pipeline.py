@@ -1,57 +1,387 @@
-"""RAG Pipeline Orchestrator."""
+"""RAG Pipeline Orchestrator.
 
-from collections.abc import AsyncGenerator
+Pipeline ini process-wide: dibuat sekali di FastAPI lifespan dan dipakai
+bersama oleh semua request. Index BM25 (dan vector index in-process jika
+`vector_backend` bukan "pgvector") dibangun saat `initialize()` dan hanya
+dibangun ulang lewat `refresh()`, sehingga request hanya melakukan query work.
 
+Build membaca corpus sebagai stream batch (server-side cursor) yang langsung
+dikonsumsi builder index di worker thread, sehingga memori tidak bergantung
+pada jumlah chunk. Setiap build menulis snapshot index ke disk bersama
+fingerprint himpunan chunk di database (`index_fingerprint`). Worker yang
+start kemudian membuka snapshot itu dengan mmap (berbagi page cache) selama
+fingerprint-nya masih sama dengan database, tanpa membaca dan men-tokenize
+ulang corpus.
+
+Ingest dan delete meng-update index secara incremental setelah transaksi
+berhasil di-commit (lihat `PostCommitRetrievalIndex`). Mutasi index berjalan
+di thread (`asyncio.to_thread`) agar lock index tidak memblokir event loop.
+Dengan `RETRIEVAL_INDEX_SYNC`, update dan `/reindex` di-broadcast lewat Redis
+pub/sub ke worker lain (lihat `RedisIndexSync`); tanpa itu update hanya
+berlaku di worker yang memproses request tersebut.
+
+Setiap branch retrieval memakai repository (session database) sendiri karena
+branch dijalankan bersamaan dan satu `AsyncSession` tidak boleh dipakai oleh
+dua operasi sekaligus; lihat `open_retriever`. Index dibangun dari primary;
+hanya query retrieval yang boleh ke read replica.
+"""
+
+import asyncio
+import logging
+import queue
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from pathlib import Path
+from typing import Literal
+from uuid import UUID
+
+from app.domain.entities.chunk import Chunk
 from app.domain.interfaces.cache_service import ICacheService
 from app.domain.interfaces.chunk_repository import IChunkRepository
 from app.domain.interfaces.embedding_service import IEmbeddingService
 from app.domain.interfaces.llm_service import ILLMService
-from app.domain.interfaces.retriever_service import RetrievalResult
-from app.infrastructure.retriever.bm25_retriever import BM25Retriever
-from app.infrastructure.retriever.hybrid_retriever import HybridRetriever
-from app.infrastructure.retriever.vector_retriever import VectorRetriever
+from app.domain.interfaces.retrieval_index import IRetrievalIndex
+from app.domain.interfaces.retriever_service import RetrievalFilter, RetrievalResult
+from app.infrastructure.retriever.bm25_index import BM25Index
+from app.infrastructure.retriever.bm25_retriever import BM25Retriever, index_entries
+from app.infrastructure.retriever.fusion import FusionMethod
+from app.infrastructure.retriever.hybrid_retriever import HybridRetriever, RetrieverBranch
+from app.infrastructure.retriever.vector_index import HNSWVectorIndex, VectorIndex
+from app.infrastructure.retriever.vector_retriever import VectorRetriever, vector_entries
+
+logger = logging.getLogger(__name__)
+
+VectorBackend = Literal["pgvector", "flat", "hnsw"]
+# Membuka repository dengan session database sendiri, ditutup saat keluar context
+ChunkRepositoryFactory = Callable[[], AbstractAsyncContextManager[IChunkRepository]]
+
+_BUILD_BATCH_SIZE = 2000
+# Batch yang boleh menunggu per builder; membatasi memori saat builder lebih lambat
+_BUILD_QUEUE_SIZE = 4
+
+
+async def _build_streaming(
+    batches: AsyncIterator[list[Chunk]],
+    builders: list[Callable[[Iterable[Chunk]], int]],
+) -> None:
+    """Jalankan setiap builder di worker thread atas stream batch yang sama."""
+    queues = [queue.Queue(maxsize=_BUILD_QUEUE_SIZE) for _ in builders]
+
+    def consume(batch_queue: queue.Queue, build: Callable[[Iterable[Chunk]], int]) -> None:
+        finished = False
+
+        def chunks() -> Iterator[Chunk]:
+            nonlocal finished
+            while (batch := batch_queue.get()) is not None:
+                yield from batch
+            finished = True
 
+        try:
+            build(chunks())
+        finally:
+            # Builder gagal: tetap kosongkan queue agar producer tidak terblokir
+            while not finished:
+                finished = batch_queue.get() is None
 
-class RAGPipeline:
+    consumers = [
+        asyncio.create_task(asyncio.to_thread(consume, q, build))
+        for q, build in zip(queues, builders)
+    ]
+    try:
+        async for batch in batches:
+            if any(consumer.done() for consumer in consumers):
+                break  # builder gagal, sisa stream tidak perlu dibaca
+            for batch_queue in queues:
+                await asyncio.to_thread(batch_queue.put, batch)
+    finally:
+        for batch_queue in queues:
+            await asyncio.to_thread(batch_queue.put, None)
+        await asyncio.gather(*consumers, return_exceptions=True)
+    # Exception builder (jika ada) di-raise setelah semua thread selesai
+    for consumer in consumers:
+        consumer.result()
+
+
+class RAGPipeline(IRetrievalIndex):
     def __init__(
         self,
-        chunk_repository: IChunkRepository,
         embedding_service: IEmbeddingService,
         llm_service: ILLMService,
         cache_service: ICacheService,
         rrf_k: int = 60,
+        fusion_method: FusionMethod = "rrf",
+        bm25_weight: float = 1.0,
+        vector_weight: float = 1.0,
+        bm25_early_termination: bool = False,
+        bm25_timeout: float | None = None,
+        vector_timeout: float | None = None,
+        bm25_snapshot_path: str | Path | None = None,
+        vector_backend: VectorBackend = "pgvector",
+        vector_snapshot_path: str | Path | None = None,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 64,
     ) -> None:
-        self._chunk_repo = chunk_repository
         self._embedding_service = embedding_service
         self._llm = llm_service
         self._cache = cache_service
         self._rrf_k = rrf_k
-        self._bm25: BM25Retriever | None = None
-        self._vector: VectorRetriever | None = None
-        self._hybrid: HybridRetriever | None = None
-
-    async def initialize(self) -> None:
-        chunks = await self._chunk_repo.get_all()
-        self._bm25 = BM25Retriever(chunks)
-        self._vector = VectorRetriever(
-            chunk_repository=self._chunk_repo,
+        self._fusion_method = fusion_method
+        self._bm25_weight = bm25_weight
+        self._vector_weight = vector_weight
+        self._bm25_early_termination = bm25_early_termination
+        self._bm25_timeout = bm25_timeout
+        self._vector_timeout = vector_timeout
+        self._snapshot_path = Path(bm25_snapshot_path) if bm25_snapshot_path else None
+        self._vector_backend = vector_backend
+        self._vector_snapshot_path = Path(vector_snapshot_path) if vector_snapshot_path else None
+        self._hnsw_params = {
+            "m": hnsw_m,
+            "ef_construction": hnsw_ef_construction,
+            "ef_search": hnsw_ef_search,
+        }
+        self._bm25_index = BM25Index()
+        self._vector_index = self._new_vector_index()
+        self._refresh_lock = asyncio.Lock()
+        # Update incremental dijalankan satu per satu, berurutan
+        self._update_lock = asyncio.Lock()
+        self._initialized = False
+        # Update incremental yang terjadi selama rebuild, di-replay ke index baru
+        self._journal: list[Callable[[BM25Index, VectorIndex | None], int]] | None = None
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._initialized
+
+    async def initialize(self, chunk_repository: IChunkRepository) -> None:
+        """Load snapshot atau build index sekali; no-op jika pipeline sudah siap."""
+        if self._initialized:
+            return
+        async with self._refresh_lock:
+            if self._initialized:
+                return
+            if not await self._load_snapshot(chunk_repository):
+                await self._rebuild(chunk_repository)
+
+    async def refresh(self, chunk_repository: IChunkRepository) -> int:
+        """Rebuild index retrieval dari repository dan swap secara atomik."""
+        async with self._refresh_lock:
+            return await self._rebuild(chunk_repository)
+
+    async def reload(self, chunk_repository: IChunkRepository) -> int:
+        """Buka snapshot terbaru jika masih sesuai database, selain itu rebuild.
+
+        Dipakai worker lain setelah `/reindex` di satu worker menulis snapshot baru.
+        """
+        async with self._refresh_lock:
+            if not await self._load_snapshot(chunk_repository):
+                await self._rebuild(chunk_repository)
+            return len(self._bm25_index)
+
+    def _new_vector_index(self) -> VectorIndex | None:
+        dimension = self._embedding_service.embedding_dimension
+        if self._vector_backend == "flat":
+            return VectorIndex(dimension)
+        if self._vector_backend == "hnsw":
+            return HNSWVectorIndex(dimension, **self._hnsw_params)
+        return None
+
+    def _load_vector_index(self) -> VectorIndex:
+        dimension = self._embedding_service.embedding_dimension
+        if self._vector_backend == "hnsw":
+            return HNSWVectorIndex.load(
+                self._vector_snapshot_path, dimension, **self._hnsw_params
+            )
+        return VectorIndex.load(self._vector_snapshot_path, dimension)
+
+    async def _load_snapshot(self, chunk_repository: IChunkRepository) -> bool:
+        if self._snapshot_path is None or not self._snapshot_path.exists():
+            return False
+        if self._vector_index is not None and (
+            self._vector_snapshot_path is None or not self._vector_snapshot_path.exists()
+        ):
+            return False
+        self._journal = []
+        try:
+            try:
+                index = await asyncio.to_thread(BM25Index.load, self._snapshot_path)
+                vector_index = None
+                if self._vector_index is not None:
+                    vector_index = await asyncio.to_thread(self._load_vector_index)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Snapshot index tidak bisa dibuka, rebuild: {e}")
+                return False
+            fingerprint = await chunk_repository.index_fingerprint()
+            if index.fingerprint != fingerprint or (
+                vector_index is not None and vector_index.fingerprint != fingerprint
+            ):
+                logger.info(
+                    f"Snapshot index stale ({index.fingerprint} vs {fingerprint} "
+                    f"di database), rebuild"
+                )
+                return False
+            for apply in self._journal:
+                apply(index, vector_index)
+            self._bm25_index = index
+            self._vector_index = vector_index
+        finally:
+            self._journal = None
+        self._initialized = True
+        logger.info(f"Retrieval index loaded from snapshot: {len(index)} chunks")
+        return True
+
+    async def _rebuild(self, chunk_repository: IChunkRepository) -> int:
+        self._journal = []
+        try:
+            fingerprint = await chunk_repository.index_fingerprint()
+            index = BM25Index()
+            vector_index = self._new_vector_index()
+            # Tokenisasi corpus CPU-bound, jangan blok event loop
+            builders = [lambda chunks: index.build(index_entries(chunks))]
+            if vector_index is not None:
+                builders.append(lambda chunks: vector_index.build(vector_entries(chunks)))
+            batches = chunk_repository.stream_for_index(
+                batch_size=_BUILD_BATCH_SIZE, with_embeddings=vector_index is not None
+            )
+            await _build_streaming(batches, builders)
+            unchanged = await chunk_repository.index_fingerprint() == fingerprint
+            for apply in self._journal:
+                apply(index, vector_index)
+            # Snapshot hanya valid jika corpus tidak berubah selama build
+            if unchanged:
+                index.fingerprint = fingerprint
+                if vector_index is not None:
+                    vector_index.fingerprint = fingerprint
+            self._bm25_index = index
+            self._vector_index = vector_index
+        finally:
+            self._journal = None
+        self._initialized = True
+        logger.info(f"Retrieval index built: {len(index)} chunks")
+        await self._save_snapshot(index, self._snapshot_path)
+        await self._save_snapshot(vector_index, self._vector_snapshot_path)
+        return len(index)
+
+    async def _save_snapshot(
+        self, index: BM25Index | VectorIndex | None, path: Path | None
+    ) -> None:
+        if index is None or path is None:
+            return
+        if index.fingerprint is None:
+            logger.info("Corpus berubah selama build, snapshot index tidak ditulis")
+            return
+        try:
+            await asyncio.to_thread(index.save, path)
+        except OSError as e:
+            logger.warning(f"Snapshot index gagal ditulis ke {path}: {e}")
+
+    async def add_chunks(self, chunks: list[Chunk]) -> None:
+        """Index chunks baru secara incremental tanpa rebuild corpus."""
+        entries = list(index_entries(chunks))
+        embeddings = list(vector_entries(chunks))
+
+        def update(index: BM25Index, vector_index: VectorIndex | None) -> int:
+            if vector_index is not None:
+                vector_index.add(embeddings)
+            return index.add(entries)
+
+        await self._apply(update)
+
+    async def remove_document(self, document_id: UUID) -> None:
+        """Hapus semua chunk milik dokumen dari index."""
+        groups = [str(document_id)]
+
+        def update(index: BM25Index, vector_index: VectorIndex | None) -> int:
+            if vector_index is not None:
+                vector_index.remove_groups(groups)
+            return index.remove_groups(groups)
+
+        await self._apply(update)
+
+    async def _apply(self, update: Callable[[BM25Index, VectorIndex | None], int]) -> None:
+        async with self._update_lock:
+            # Journal di-append di event loop, tanpa await sebelum index dipilih,
+            # sehingga update tidak terlewat oleh swap index saat build/load
+            if self._journal is not None:
+                self._journal.append(update)
+            # Mutasi memegang lock index; di worker thread agar event loop tidak
+            # ikut menunggu search yang sedang berjalan
+            await asyncio.to_thread(update, self._bm25_index, self._vector_index)
+
+    def get_retriever(
+        self, bm25_repository: IChunkRepository, vector_repository: IChunkRepository
+    ) -> HybridRetriever:
+        """Hybrid retriever untuk satu request di atas index bersama.
+
+        Kedua repository harus memakai session berbeda: branch BM25 dan vector
+        mengakses database bersamaan.
+        """
+        vector = VectorRetriever(
+            chunk_repository=vector_repository,
             embedding_service=self._embedding_service,
+            index=self._vector_index,
+        )
+        bm25 = BM25Retriever(
+            index=self._bm25_index,
+            chunk_repository=bm25_repository,
+            early_termination=self._bm25_early_termination,
         )
-        self._hybrid = HybridRetriever(
-            bm25_retriever=self._bm25,
-            vector_retriever=self._vector,
+        return HybridRetriever(
+            branches=[
+                RetrieverBranch("bm25", bm25, self._bm25_weight, self._bm25_timeout),
+                RetrieverBranch("vector", vector, self._vector_weight, self._vector_timeout),
+            ],
+            fusion_method=self._fusion_method,
             rrf_k=self._rrf_k,
         )
 
-    async def retrieve(self, query: str, top_k: int = 5) -> list[RetrievalResult]:
-        if self._hybrid is None:
-            await self.initialize()
-        return await self._hybrid.retrieve(query, top_k)
+    @asynccontextmanager
+    async def open_retriever(
+        self,
+        open_repository: ChunkRepositoryFactory,
+        open_build_repository: ChunkRepositoryFactory | None = None,
+    ) -> AsyncIterator[HybridRetriever]:
+        """Hybrid retriever dengan satu repository (session) per branch.
+
+        `open_repository` untuk query (boleh replica); index yang belum dibangun
+        dibangun dari `open_build_repository` (primary), default `open_repository`.
+        """
+        if not self._initialized:
+            async with (open_build_repository or open_repository)() as build_repository:
+                await self.initialize(build_repository)
+        async with open_repository() as bm25_repository, open_repository() as vector_repository:
+            yield self.get_retriever(bm25_repository, vector_repository)
+
+    async def retrieve(
+        self,
+        query: str,
+        open_repository: ChunkRepositoryFactory,
+        top_k: int = 5,
+        filters: RetrievalFilter | None = None,
+    ) -> list[RetrievalResult]:
+        async with self.open_retriever(open_repository) as retriever:
+            return await retriever.retrieve(query, top_k, filters)
+
+    async def retrieve_many(
+        self,
+        queries: list[str],
+        open_repository: ChunkRepositoryFactory,
+        top_k: int = 5,
+        filters: RetrievalFilter | None = None,
+    ) -> list[list[RetrievalResult]]:
+        """Hybrid retrieval untuk banyak query (evaluasi, batch QA, query expansion)."""
+        async with self.open_retriever(open_repository) as retriever:
+            return await retriever.retrieve_many(queries, top_k, filters)
 
     async def generate(
-        self, query: str, top_k: int = 5, chat_history: list[dict] | None = None
+        self,
+        query: str,
+        open_repository: ChunkRepositoryFactory,
+        top_k: int = 5,
+        chat_history: list[dict] | None = None,
+        filters: RetrievalFilter | None = None,
     ) -> tuple[str, list[RetrievalResult]]:
-        results = await self.retrieve(query, top_k)
+        results = await self.retrieve(query, open_repository, top_k, filters)
         context = self._build_context(results)
         response = await self._llm.generate(
             prompt=query, context=context, chat_history=chat_history
@@ -1,34 +1,47 @@
-"""Chat with RAG Use Case."""
+"""Chat with RAG Use Case.
+
+Retriever dibuka lewat factory (async context manager) hanya selama fase
+retrieval; koneksi database sudah dikembalikan ke pool sebelum generate LLM,
+sehingga ukuran pool tidak membatasi jumlah chat yang sedang menunggu LLM.
+"""
 
 import hashlib
+import json
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
 from uuid import uuid4
 
 from app.config import get_settings
 from app.domain.entities.chat_message import ChatMessage
 from app.domain.interfaces.cache_service import ICacheService
 from app.domain.interfaces.llm_service import ILLMService
-from app.domain.interfaces.retriever_service import IRetrieverService
+from app.domain.interfaces.retriever_service import IRetrieverService, RetrievalFilter
+
+RetrieverFactory = Callable[[], AbstractAsyncContextManager[IRetrieverService]]
 
 
 class ChatWithRAGUseCase:
     def __init__(
         self,
-        retriever: IRetrieverService,
+        retriever_factory: RetrieverFactory,
         llm_service: ILLMService,
         cache_service: ICacheService,
     ) -> None:
-        self._retriever = retriever
+        self._retriever_factory = retriever_factory
         self._llm = llm_service
         self._cache = cache_service
         self._settings = get_settings()
 
     async def execute(
-        self, message: str, session_id: str | None = None
+        self,
+        message: str,
+        session_id: str | None = None,
+        filters: RetrievalFilter | None = None,
     ) -> tuple[str, str, list[str], bool]:
         if not session_id:
             session_id = str(uuid4())
 
-        cache_key = self._generate_cache_key(message)
+        cache_key = self._generate_cache_key(message, filters)
         cached_response = await self._cache.get(cache_key)
 
         if cached_response:
@@ -43,9 +56,10 @@ class ChatWithRAGUseCase:
         history = await self._cache.get_chat_history(session_id, limit=10)
         chat_history = [msg.to_dict() for msg in history]
 
-        results = await self._retriever.retrieve(
-            query=message, top_k=self._settings.top_k
-        )
+        async with self._retriever_factory() as retriever:
+            results = await retriever.retrieve(
+                query=message, top_k=self._settings.top_k, filters=filters
+            )
 
         context_parts = []
         sources = []
@@ -79,6 +93,14 @@ class ChatWithRAGUseCase:
         )
         await self._cache.save_chat_message(session_id, assistant_msg)
 
-    def _generate_cache_key(self, message: str) -> str:
-        hash_val = hashlib.md5(message.lower().strip().encode()).hexdigest()
+    def _generate_cache_key(self, message: str, filters: RetrievalFilter | None = None) -> str:
+        key = message.lower().strip()
+        if filters is not None and not filters.is_empty:
+            # Jawaban ber-filter tidak boleh tertukar dengan jawaban tanpa filter
+            document_ids = None
+            if filters.document_ids is not None:
+                document_ids = sorted(str(d) for d in filters.document_ids)
+            scope = {"document_ids": document_ids, "metadata": filters.metadata}
+            key += "\n" + json.dumps(scope, sort_keys=True, default=str)
+        hash_val = hashlib.md5(key.encode()).hexdigest()
         return f"rag:response:{hash_val}"
@@ -2,6 +2,7 @@
 
 import hashlib
 import json
+from collections.abc import Callable
 from typing import Any
 from uuid import uuid4
 
@@ -13,6 +14,9 @@ from app.domain.entities.document import Document
 from app.domain.interfaces.chunk_repository import IChunkRepository
 from app.domain.interfaces.document_repository import IDocumentRepository
 from app.domain.interfaces.embedding_service import IEmbeddingService
+from app.domain.interfaces.retrieval_index import IRetrievalIndex
+
+TermFrequencies = Callable[[str], dict[str, int]]
 
 
 class IngestDocumentUseCase:
@@ -21,10 +25,15 @@ class IngestDocumentUseCase:
         document_repo: IDocumentRepository,
         chunk_repo: IChunkRepository,
         embedding_service: IEmbeddingService,
+        retrieval_index: IRetrievalIndex | None = None,
+        term_frequencies: TermFrequencies | None = None,
     ) -> None:
         self._doc_repo = document_repo
         self._chunk_repo = chunk_repo
         self._embedding_service = embedding_service
+        self._retrieval_index = retrieval_index
+        # Statistik term untuk BM25 (tokenizer index retrieval), di-inject dari luar
+        self._term_frequencies = term_frequencies
         self._settings = get_settings()
         self._splitter = RecursiveCharacterTextSplitter(
             chunk_size=self._settings.chunk_size,
@@ -52,15 +61,21 @@ class IngestDocumentUseCase:
         )
 
         chunk_texts = self._splitter.split_text(combined_text)
-        embeddings = await self._embedding_service.embed_texts(chunk_texts)
 
-        chunks = []
-        for idx, (text, embedding) in enumerate(zip(chunk_texts, embeddings)):
-            chunk_hash = self._generate_hash(text)
-            existing_chunk = await self._chunk_repo.get_by_hash(chunk_hash)
-            if existing_chunk:
-                continue
+        # Dedup sebelum embedding: duplikat di dalam dokumen dan chunk yang sudah
+        # tersimpan (satu query) tidak di-embed
+        new_chunks: dict[str, tuple[int, str]] = {}
+        for idx, text in enumerate(chunk_texts):
+            new_chunks.setdefault(self._generate_hash(text), (idx, text))
+        existing_hashes = await self._chunk_repo.get_existing_hashes(list(new_chunks))
+        for chunk_hash in existing_hashes:
+            new_chunks.pop(chunk_hash, None)
 
+        texts_to_embed = [text for _, text in new_chunks.values()]
+        embeddings = await self._embedding_service.embed_texts(texts_to_embed)
+
+        chunks = []
+        for (chunk_hash, (idx, text)), embedding in zip(new_chunks.items(), embeddings):
             chunk = Chunk(
                 id=uuid4(),
                 document_id=document.id,
@@ -68,6 +83,9 @@ class IngestDocumentUseCase:
                 chunk_index=idx,
                 content_hash=chunk_hash,
                 embedding=embedding,
+                term_frequencies=(
+                    self._term_frequencies(text) if self._term_frequencies else None
+                ),
                 metadata={"document_filename": filename, "chunk_index": idx},
             )
             chunks.append(chunk)
@@ -75,6 +93,8 @@ class IngestDocumentUseCase:
         await self._doc_repo.save(document)
         if chunks:
             await self._chunk_repo.save_many(chunks)
+            if self._retrieval_index is not None:
+                await self._retrieval_index.add_chunks(chunks)
 
         return document, len(chunks)
 
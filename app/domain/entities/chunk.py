@@ -18,6 +18,7 @@ class Chunk(BaseModel):
     chunk_index: int
     content_hash: str
     embedding: list[float] | None = None
+    term_frequencies: dict[str, int] | None = None
     metadata: dict[str, Any] = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.now)
 
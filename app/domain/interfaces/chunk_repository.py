@@ -1,9 +1,11 @@
 """Chunk Repository Interface."""
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from uuid import UUID
 
 from app.domain.entities.chunk import Chunk
+from app.domain.interfaces.retriever_service import RetrievalFilter
 
 
 class IChunkRepository(ABC):
@@ -25,16 +27,64 @@ class IChunkRepository(ABC):
     async def get_all(self, limit: int = 1000) -> list[Chunk]:
         pass
 
+    @abstractmethod
+    def stream_for_index(
+        self, batch_size: int = 2000, with_embeddings: bool = False
+    ) -> AsyncIterator[list[Chunk]]:
+        """Semua chunk per batch untuk build index retrieval.
+
+        Hanya kolom yang dibutuhkan index (id, document_id, content,
+        content_hash, term_frequencies; embedding jika `with_embeddings`).
+        """
+        pass
+
+    @abstractmethod
+    async def get_by_ids(self, chunk_ids: list[UUID]) -> list[Chunk]:
+        """Ambil chunks berdasarkan id (tanpa embedding)."""
+        pass
+
+    @abstractmethod
+    async def index_fingerprint(self) -> str:
+        """Identitas himpunan chunk saat ini; berubah jika ada chunk ditambah/dihapus.
+
+        Disimpan di snapshot index untuk mendeteksi snapshot yang stale.
+        """
+        pass
+
+    @abstractmethod
+    async def get_ids_by_filter(self, filters: RetrievalFilter) -> list[UUID]:
+        """Id semua chunk yang lolos filter."""
+        pass
+
     @abstractmethod
     async def search_by_embedding(
-        self, embedding: list[float], top_k: int = 5
+        self,
+        embedding: list[float],
+        top_k: int = 5,
+        filters: RetrievalFilter | None = None,
     ) -> list[tuple[Chunk, float]]:
         pass
 
+    @abstractmethod
+    async def search_by_embeddings(
+        self,
+        embeddings: list[list[float]],
+        top_k: int = 5,
+        filters: RetrievalFilter | None = None,
+    ) -> list[list[tuple[Chunk, float]]]:
+        """Seperti `search_by_embedding` untuk banyak query sekaligus; hasil
+        per query, urutan sama dengan `embeddings`."""
+        pass
+
     @abstractmethod
     async def get_by_hash(self, content_hash: str) -> Chunk | None:
         pass
 
+    @abstractmethod
+    async def get_existing_hashes(self, content_hashes: list[str]) -> set[str]:
+        """Subset `content_hashes` yang sudah tersimpan (satu query)."""
+        pass
+
     @abstractmethod
     async def delete_by_document_id(self, document_id: UUID) -> int:
         pass
@@ -1,10 +1,29 @@
 """Document Repository Interface."""
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
 from uuid import UUID
 
 from app.domain.entities.document import Document
 
+# Posisi keyset: (created_at, id) dokumen terakhir di halaman sebelumnya
+DocumentCursor = tuple[datetime, UUID]
+
+
+@dataclass
+class DocumentSummary:
+    document: Document
+    chunk_count: int
+
+
+@dataclass
+class DocumentPage:
+    """Satu halaman dokumen (created_at terbaru dulu) beserta total dokumen."""
+    items: list[DocumentSummary]
+    total: int
+    next_cursor: DocumentCursor | None
+
 
 class IDocumentRepository(ABC):
     """Interface untuk Document Repository."""
@@ -25,6 +44,13 @@ class IDocumentRepository(ABC):
     async def get_all(self, limit: int = 100, offset: int = 0) -> list[Document]:
         pass
 
+    @abstractmethod
+    async def list_page(
+        self, limit: int = 20, after: DocumentCursor | None = None
+    ) -> DocumentPage:
+        """Dokumen dengan jumlah chunk dan total, keyset pagination pada (created_at, id)."""
+        pass
+
     @abstractmethod
     async def delete(self, document_id: UUID) -> bool:
         pass
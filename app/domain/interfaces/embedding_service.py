@@ -1,5 +1,6 @@
 """Embedding Service Interface."""
 
+import asyncio
 from abc import ABC, abstractmethod
 
 
@@ -14,6 +15,13 @@ class IEmbeddingService(ABC):
     async def embed_texts(self, texts: list[str]) -> list[list[float]]:
         pass
 
+    async def embed_query(self, query: str) -> list[float]:
+        """Embedding untuk query pencarian; default sama dengan `embed_text`."""
+        return await self.embed_text(query)
+
+    async def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        return list(await asyncio.gather(*(self.embed_query(q) for q in queries)))
+
     @property
     @abstractmethod
     def embedding_dimension(self) -> int:
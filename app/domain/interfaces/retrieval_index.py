@@ -0,0 +1,18 @@
+"""Retrieval Index Interface."""
+
+from abc import ABC, abstractmethod
+from uuid import UUID
+
+from app.domain.entities.chunk import Chunk
+
+
+class IRetrievalIndex(ABC):
+    """Interface untuk index retrieval yang di-update incremental."""
+
+    @abstractmethod
+    async def add_chunks(self, chunks: list[Chunk]) -> None:
+        pass
+
+    @abstractmethod
+    async def remove_document(self, document_id: UUID) -> None:
+        pass
@@ -1,7 +1,10 @@
 """Retriever Service Interface."""
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
 
 from app.domain.entities.chunk import Chunk
 
@@ -14,9 +17,33 @@ class RetrievalResult:
     source: str  # "bm25", "vector", atau "hybrid"
 
 
+@dataclass(frozen=True)
+class RetrievalFilter:
+    """Batasan retrieval: chunk milik `document_ids` dan/atau metadata yang
+    memuat semua pasangan di `metadata` (JSONB containment, mis.
+    {"document_filename": "a.pdf"}). Field None = tidak dibatasi."""
+    document_ids: tuple[UUID, ...] | None = None
+    metadata: dict[str, Any] | None = None
+
+    @property
+    def is_empty(self) -> bool:
+        return self.document_ids is None and not self.metadata
+
+
 class IRetrieverService(ABC):
     """Interface untuk Retriever Service."""
 
     @abstractmethod
-    async def retrieve(self, query: str, top_k: int = 5) -> list[RetrievalResult]:
+    async def retrieve(
+        self, query: str, top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[RetrievalResult]:
         pass
+
+    async def retrieve_many(
+        self, queries: list[str], top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[list[RetrievalResult]]:
+        """Retrieve untuk banyak query; default-nya `retrieve` per query secara
+        concurrent, implementasi bisa meng-override dengan satu operasi batch."""
+        return list(
+            await asyncio.gather(*(self.retrieve(q, top_k, filters) for q in queries))
+        )
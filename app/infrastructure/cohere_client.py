@@ -0,0 +1,47 @@
+"""Shared async Cohere client.
+
+Satu `cohere.AsyncClientV2` per process untuk embedding dan LLM, di atas satu
+`httpx.AsyncClient` (connection pool + keep-alive), sehingga request ke Cohere
+tidak memblok event loop dan koneksi TLS dipakai ulang.
+"""
+
+import logging
+
+import cohere
+import httpx
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_http_client: httpx.AsyncClient | None = None
+_client: cohere.AsyncClientV2 | None = None
+
+
+def get_cohere_client() -> cohere.AsyncClientV2:
+    global _http_client, _client
+    if _client is None:
+        settings = get_settings()
+        _http_client = httpx.AsyncClient(
+            timeout=settings.cohere_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.cohere_max_connections,
+                max_keepalive_connections=settings.cohere_max_connections,
+            ),
+        )
+        _client = cohere.AsyncClientV2(
+            api_key=settings.cohere_api_key,
+            timeout=settings.cohere_timeout,
+            httpx_client=_http_client,
+        )
+        logger.info(f"Cohere client created: max_connections={settings.cohere_max_connections}")
+    return _client
+
+
+async def close_cohere_client() -> None:
+    global _http_client, _client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        _client = None
+        logger.info("Cohere client closed")
@@ -5,15 +5,21 @@ Production-ready implementation dengan:
 - Pool timeout dan recycle untuk stale connection prevention
 - Health check method
 - Logging untuk monitoring
+- Read replica opsional (round-robin, fallback ke primary) untuk query read-only
+- Callback setelah commit (`run_after_commit`) untuk efek samping di luar database
 """
 
+import asyncio
+import inspect
+import itertools
 import logging
 import time
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
 from contextlib import asynccontextmanager
 from typing import Any
 
-from sqlalchemy import text
+from pgvector.asyncpg import register_vector
+from sqlalchemy import event, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -21,9 +27,10 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
 
 from app.config import get_settings
+from app.infrastructure.database.vector_index import ensure_vector_index
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +41,35 @@ class Base(DeclarativeBase):
 
 _engine: AsyncEngine | None = None
 _async_session_maker: async_sessionmaker[AsyncSession] | None = None
+_replica_engines: list[AsyncEngine] = []
+_replica_session_makers: list[async_sessionmaker[AsyncSession]] | None = None
+_replica_cycle: itertools.cycle | None = None
+# index replica -> waktu (monotonic) sampai replica dicoba lagi
+_replica_down_until: dict[int, float] = {}
+
+
+def _register_vector_codec(dbapi_connection, connection_record) -> None:
+    """Codec binary pgvector per koneksi asyncpg (tanpa serialisasi teks)."""
+    try:
+        dbapi_connection.run_async(register_vector)
+    except ValueError as e:
+        # Extension vector belum dibuat (lihat create_database.py)
+        logger.warning(f"pgvector codec not registered: {e}")
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    settings = get_settings()
+    engine = create_async_engine(
+        url,
+        echo=settings.debug,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    event.listen(engine.sync_engine, "connect", _register_vector_codec)
+    return engine
 
 
 def get_engine() -> AsyncEngine:
@@ -42,15 +78,7 @@ def get_engine() -> AsyncEngine:
     if _engine is None:
         settings = get_settings()
         try:
-            _engine = create_async_engine(
-                settings.database_url,
-                echo=settings.debug,
-                pool_pre_ping=True,
-                pool_size=settings.db_pool_size,
-                max_overflow=settings.db_max_overflow,
-                pool_timeout=settings.db_pool_timeout,
-                pool_recycle=settings.db_pool_recycle,
-            )
+            _engine = _create_engine(settings.database_url)
             logger.info(
                 f"Database engine created: pool_size={settings.db_pool_size}, "
                 f"max_overflow={settings.db_max_overflow}, "
@@ -74,6 +102,45 @@ def get_session_maker() -> async_sessionmaker[AsyncSession]:
     return _async_session_maker
 
 
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+# Referensi task callback async agar tidak di-garbage-collect sebelum selesai
+_after_commit_tasks: set[asyncio.Task] = set()
+
+
+def run_after_commit(session: AsyncSession, callback: Callable[[], object]) -> None:
+    """Jalankan `callback` setelah transaksi session berhasil di-commit.
+
+    Jika callback mengembalikan coroutine, coroutine dijalankan sebagai task di
+    event loop. Jika transaksi di-rollback, callback dibuang.
+    """
+    session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT_KEY, []):
+        try:
+            result = callback()
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                _after_commit_tasks.add(task)
+                task.add_done_callback(_after_commit_task_done)
+        except Exception as e:
+            # Data sudah ter-commit; kegagalan callback tidak boleh menggagalkan request
+            logger.error(f"After-commit callback failed: {e}")
+
+
+def _after_commit_task_done(task: asyncio.Task) -> None:
+    _after_commit_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"After-commit callback failed: {task.exception()}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit_callbacks(session: Session) -> None:
+    session.info.pop(_AFTER_COMMIT_KEY, None)
+
+
 @asynccontextmanager
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Get database session dengan proper error handling."""
@@ -94,6 +161,56 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         await session.close()
 
 
+def _get_replica_session_makers() -> list[async_sessionmaker[AsyncSession]]:
+    global _replica_session_makers, _replica_cycle
+    if _replica_session_makers is None:
+        urls = get_settings().replica_urls
+        _replica_engines.extend(_create_engine(url) for url in urls)
+        _replica_session_makers = [
+            async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+            for engine in _replica_engines
+        ]
+        _replica_cycle = itertools.cycle(range(len(urls)))
+        if urls:
+            logger.info(f"Database read replicas configured: {len(urls)}")
+    return _replica_session_makers
+
+
+async def _open_read_session() -> AsyncSession:
+    """Session di replica berikutnya (round-robin) yang bisa dihubungi, atau primary."""
+    session_makers = _get_replica_session_makers()
+    now = time.monotonic()
+    for _ in range(len(session_makers)):
+        index = next(_replica_cycle)
+        if _replica_down_until.get(index, 0) > now:
+            continue
+        session = session_makers[index]()
+        try:
+            # Checkout koneksi sekarang agar replica yang mati ketahuan sebelum query
+            await session.connection()
+        except (SQLAlchemyError, OSError) as e:
+            await session.close()
+            retry = get_settings().database_replica_retry_interval
+            _replica_down_until[index] = now + retry
+            logger.warning(f"Read replica {index} unavailable, skipped for {retry}s: {e}")
+            continue
+        return session
+    return get_session_maker()()
+
+
+@asynccontextmanager
+async def get_read_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session untuk query read-only: replica jika dikonfigurasi, selain itu primary."""
+    session = await _open_read_session()
+    try:
+        yield session
+    except SQLAlchemyError as e:
+        logger.error(f"Database read session error: {e}")
+        raise
+    finally:
+        await session.close()
+
+
 async def health_check() -> dict[str, Any]:
     """Check database connectivity dan return health status."""
     result: dict[str, Any] = {
@@ -129,12 +246,24 @@ async def health_check() -> dict[str, Any]:
     return result
 
 
+# Kolom yang ditambahkan setelah tabel dibuat; create_all tidak meng-ALTER tabel lama
+_SCHEMA_MIGRATIONS = (
+    "ALTER TABLE chunks ADD COLUMN IF NOT EXISTS term_frequencies JSONB",
+    "CREATE INDEX IF NOT EXISTS chunks_metadata_idx "
+    "ON chunks USING gin (metadata jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS documents_created_at_id_idx ON documents (created_at, id)",
+)
+
+
 async def init_db() -> None:
-    """Initialize database - create all tables."""
+    """Initialize database - create all tables dan vector index."""
     try:
         engine = get_engine()
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            for statement in _SCHEMA_MIGRATIONS:
+                await conn.execute(text(statement))
+            await ensure_vector_index(conn, get_settings())
         logger.info("Database tables initialized successfully")
     except SQLAlchemyError as e:
         logger.error(f"Failed to initialize database: {e}")
@@ -143,9 +272,17 @@ async def init_db() -> None:
 
 async def close_db() -> None:
     """Close database connection dan cleanup resources."""
-    global _engine, _async_session_maker
+    global _engine, _async_session_maker, _replica_session_makers, _replica_cycle
     if _engine is not None:
         await _engine.dispose()
         _engine = None
         _async_session_maker = None
         logger.info("Database connection closed")
+    if _replica_engines:
+        for engine in _replica_engines:
+            await engine.dispose()
+        _replica_engines.clear()
+        logger.info("Database read replica connections closed")
+    _replica_session_makers = None
+    _replica_cycle = None
+    _replica_down_until.clear()
@@ -9,10 +9,29 @@ from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.infrastructure.database.connection import Base
+from app.infrastructure.database.vector_index import EMBEDDING_DIMENSION
+
+
+class NativeVector(Vector):
+    """Vector yang di-bind apa adanya ke codec binary pgvector asyncpg.
+
+    `Vector` bawaan mengubah parameter menjadi literal teks "[0.1,...]";
+    dengan codec yang di-register di engine (lihat `connection.py`) list
+    atau ndarray dikirim sebagai float32 binary.
+    """
+
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        return None
 
 
 class DocumentModel(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Keyset pagination listing dokumen (created_at, id) desc
+        Index("documents_created_at_id_idx", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4())
@@ -36,6 +55,15 @@ class DocumentModel(Base):
 
 class ChunkModel(Base):
     __tablename__ = "chunks"
+    __table_args__ = (
+        # Filter retrieval metadata @> {...}
+        Index(
+            "chunks_metadata_idx",
+            "metadata",
+            postgresql_using="gin",
+            postgresql_ops={"metadata": "jsonb_path_ops"},
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4())
@@ -51,7 +79,8 @@ class ChunkModel(Base):
     content_hash: Mapped[str] = mapped_column(
         String(64), unique=True, nullable=False, index=True
     )
-    embedding = mapped_column(Vector(1024), nullable=True)
+    embedding = mapped_column(NativeVector(EMBEDDING_DIMENSION), nullable=True)
+    term_frequencies: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     metadata_: Mapped[dict] = mapped_column("metadata", JSONB, default=dict)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
@@ -60,13 +89,3 @@ class ChunkModel(Base):
     document: Mapped["DocumentModel"] = relationship(
         "DocumentModel", back_populates="chunks"
     )
-
-    __table_args__ = (
-        Index(
-            "chunks_embedding_idx",
-            embedding,
-            postgresql_using="ivfflat",
-            postgresql_with={"lists": 100},
-            postgresql_ops={"embedding": "vector_cosine_ops"},
-        ),
-    )
@@ -1,18 +1,81 @@
 """Chunk Repository Implementation."""
 
+import json
+import logging
+from collections.abc import AsyncIterator
 from uuid import UUID
 
-from sqlalchemy import delete, select, text
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import (
+    Row,
+    Select,
+    String,
+    bindparam,
+    cast,
+    delete,
+    func,
+    select,
+    text,
+    true,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, BIT
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.entities.chunk import Chunk
 from app.domain.interfaces.chunk_repository import IChunkRepository
-from app.infrastructure.database.models import ChunkModel
+from app.domain.interfaces.retriever_service import RetrievalFilter
+from app.infrastructure.database.models import ChunkModel, NativeVector
+from app.infrastructure.database.vector_index import EMBEDDING_DIMENSION, Quantization
+
+logger = logging.getLogger(__name__)
+
+# Batas atas hnsw.ef_search yang diterima pgvector
+_HNSW_MAX_EF_SEARCH = 1000
+
+# Urutan kolom untuk COPY bulk insert
+_COPY_COLUMNS = (
+    "id",
+    "document_id",
+    "content",
+    "chunk_index",
+    "content_hash",
+    "embedding",
+    "term_frequencies",
+    "metadata",
+    "created_at",
+)
+
+# Kolom yang dibutuhkan path retrieval/chat; embedding dan term frequencies
+# tidak ikut ditransfer
+_CHUNK_COLUMNS = (
+    ChunkModel.id,
+    ChunkModel.document_id,
+    ChunkModel.content,
+    ChunkModel.chunk_index,
+    ChunkModel.content_hash,
+    ChunkModel.metadata_.label("metadata"),
+    ChunkModel.created_at,
+)
 
 
 class PostgresChunkRepository(IChunkRepository):
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        hnsw_ef_search: int | None = None,
+        ivfflat_probes: int | None = None,
+        iterative_scan: str | None = None,
+        quantization: Quantization = "none",
+        rerank_oversample: int = 4,
+        copy_threshold: int | None = None,
+    ) -> None:
         self._session = session
+        self._copy_threshold = copy_threshold
+        self._quantization = quantization
+        self._rerank_oversample = max(rerank_oversample, 1)
+        self._hnsw_ef_search = hnsw_ef_search
+        self._ivfflat_probes = ivfflat_probes
+        self._iterative_scan = iterative_scan
 
     async def save(self, chunk: Chunk) -> Chunk:
         db_model = self._to_model(chunk)
@@ -21,11 +84,42 @@ class PostgresChunkRepository(IChunkRepository):
         return chunk
 
     async def save_many(self, chunks: list[Chunk]) -> list[Chunk]:
+        if self._copy_threshold is not None and len(chunks) >= self._copy_threshold:
+            await self._copy_many(chunks)
+            return chunks
         db_models = [self._to_model(c) for c in chunks]
         self._session.add_all(db_models)
         await self._session.flush()
         return chunks
 
+    async def _copy_many(self, chunks: list[Chunk]) -> None:
+        """Bulk insert dengan binary COPY lewat koneksi asyncpg milik session.
+
+        Tetap di transaksi session yang sama (commit/rollback ikut session);
+        embedding di-encode oleh codec binary pgvector, tanpa ORM unit of work.
+        """
+        # Row yang masih pending di session (mis. document) harus ada sebelum COPY (FK)
+        await self._session.flush()
+        connection = await self._session.connection()
+        raw_connection = await connection.get_raw_connection()
+        records = (
+            (
+                str(c.id),
+                str(c.document_id),
+                c.content,
+                c.chunk_index,
+                c.content_hash,
+                c.embedding,
+                json.dumps(c.term_frequencies) if c.term_frequencies is not None else None,
+                json.dumps(c.metadata),
+                c.created_at,
+            )
+            for c in chunks
+        )
+        await raw_connection.driver_connection.copy_records_to_table(
+            ChunkModel.__tablename__, records=records, columns=_COPY_COLUMNS
+        )
+
     async def get_by_document_id(self, document_id: UUID) -> list[Chunk]:
         stmt = (
             select(ChunkModel)
@@ -40,34 +134,203 @@ class PostgresChunkRepository(IChunkRepository):
         result = await self._session.execute(stmt)
         return [self._to_entity(m) for m in result.scalars().all()]
 
+    async def stream_for_index(
+        self, batch_size: int = 2000, with_embeddings: bool = False
+    ) -> AsyncIterator[list[Chunk]]:
+        """Server-side cursor; memori dibatasi satu batch, berapa pun jumlah chunk."""
+        columns = [
+            ChunkModel.id,
+            ChunkModel.document_id,
+            ChunkModel.content,
+            ChunkModel.chunk_index,
+            ChunkModel.content_hash,
+            ChunkModel.term_frequencies,
+        ]
+        if with_embeddings:
+            columns.append(ChunkModel.embedding)
+        stmt = select(*columns).execution_options(yield_per=batch_size)
+        result = await self._session.stream(stmt)
+        async for rows in result.partitions():
+            # model_construct: data dari database, validasi pydantic per chunk dilewati
+            yield [
+                Chunk.model_construct(
+                    id=UUID(row.id),
+                    document_id=UUID(row.document_id),
+                    content=row.content,
+                    chunk_index=row.chunk_index,
+                    content_hash=row.content_hash,
+                    term_frequencies=row.term_frequencies,
+                    embedding=(
+                        list(row.embedding)
+                        if with_embeddings and row.embedding is not None
+                        else None
+                    ),
+                )
+                for row in rows
+            ]
+
+    async def get_by_ids(self, chunk_ids: list[UUID]) -> list[Chunk]:
+        if not chunk_ids:
+            return []
+        stmt = select(*_CHUNK_COLUMNS).where(ChunkModel.id.in_([str(c) for c in chunk_ids]))
+        result = await self._session.execute(stmt)
+        return [self._row_to_entity(row) for row in result.all()]
+
+    async def index_fingerprint(self) -> str:
+        # count + jumlah hash 64-bit per id: tidak bergantung urutan (tanpa sort),
+        # berubah jika ada chunk ditambah atau dihapus walau jumlahnya sama
+        result = await self._session.execute(
+            text(
+                "SELECT count(*), "
+                "coalesce(sum(('x' || left(md5(id::text), 16))::bit(64)::bigint), 0) "
+                "FROM chunks"
+            )
+        )
+        count, checksum = result.one()
+        return f"{count}:{checksum}"
+
+    async def get_ids_by_filter(self, filters: RetrievalFilter) -> list[UUID]:
+        stmt = select(ChunkModel.id).where(*self._filter_clauses(filters))
+        result = await self._session.execute(stmt)
+        return [UUID(chunk_id) for chunk_id in result.scalars().all()]
+
     async def search_by_embedding(
-        self, embedding: list[float], top_k: int = 5
+        self,
+        embedding: list[float],
+        top_k: int = 5,
+        filters: RetrievalFilter | None = None,
     ) -> list[tuple[Chunk, float]]:
-        embedding_str = "[" + ",".join(str(x) for x in embedding) + "]"
-        query = text("""
-            SELECT id, document_id, content, chunk_index, content_hash,
-                   embedding, metadata, created_at,
-                   1 - (embedding <=> :embedding::vector) as similarity
-            FROM chunks WHERE embedding IS NOT NULL
-            ORDER BY embedding <=> :embedding::vector LIMIT :top_k
-        """)
-        result = await self._session.execute(
-            query, {"embedding": embedding_str, "top_k": top_k}
+        filters = filters if filters is not None and not filters.is_empty else None
+        await self._apply_search_settings(self._candidate_limit(top_k), filters is not None)
+        # Vector query di-bind sekali sebagai parameter pgvector binary (NativeVector).
+        # Tipe parameter dikunci ke vector; tanpa cast Postgres bisa menyimpulkan
+        # halfvec dari pemakaian pertamanya
+        query = cast(
+            bindparam("query_embedding", embedding, type_=NativeVector(EMBEDDING_DIMENSION)),
+            NativeVector(EMBEDDING_DIMENSION),
         )
-        results = []
-        for row in result.fetchall():
-            chunk = Chunk(
-                id=UUID(row.id),
-                document_id=UUID(row.document_id),
-                content=row.content,
-                chunk_index=row.chunk_index,
-                content_hash=row.content_hash,
-                embedding=list(row.embedding) if row.embedding else None,
-                metadata=row.metadata,
-                created_at=row.created_at,
+        result = await self._session.execute(self._ranking(query, top_k, filters))
+        return [(self._row_to_entity(row), 1 - float(row.distance)) for row in result.all()]
+
+    async def search_by_embeddings(
+        self,
+        embeddings: list[list[float]],
+        top_k: int = 5,
+        filters: RetrievalFilter | None = None,
+    ) -> list[list[tuple[Chunk, float]]]:
+        """Satu statement untuk N query: unnest(vector[]) + LATERAL top-k per query."""
+        if not embeddings:
+            return []
+        filters = filters if filters is not None and not filters.is_empty else None
+        await self._apply_search_settings(self._candidate_limit(top_k), filters is not None)
+        queries = (
+            func.unnest(
+                bindparam(
+                    "query_embeddings",
+                    [list(e) for e in embeddings],
+                    type_=ARRAY(NativeVector(EMBEDDING_DIMENSION)),
+                )
             )
-            results.append((chunk, float(row.similarity)))
-        return results
+            .table_valued("embedding", with_ordinality="ord")
+            .render_derived(name="queries")
+        )
+        hits = self._ranking(queries.c.embedding, top_k, filters).lateral("hits")
+        stmt = (
+            select(queries.c.ord, hits)
+            .select_from(queries.join(hits, true()))
+            .order_by(queries.c.ord, hits.c.distance)
+        )
+        result = await self._session.execute(stmt)
+
+        ranked: list[list[tuple[Chunk, float]]] = [[] for _ in embeddings]
+        for row in result.all():
+            ranked[row.ord - 1].append((self._row_to_entity(row), 1 - float(row.distance)))
+        return ranked
+
+    def _candidate_limit(self, top_k: int) -> int:
+        if self._quantization == "none":
+            return top_k
+        return top_k * self._rerank_oversample
+
+    def _ranking(self, query, top_k: int, filters: RetrievalFilter | None) -> Select:
+        """Top-k chunk terdekat ke `query` (ekspresi vector) beserta distance.
+
+        Dengan quantization: kandidat top_k * oversample dari index quantized,
+        lalu ranking ulang dengan cosine distance float32 (hanya untuk kandidat).
+        """
+        if self._quantization == "none":
+            distance = ChunkModel.embedding.cosine_distance(query).label("distance")
+            stmt = (
+                select(*_CHUNK_COLUMNS, distance)
+                .where(ChunkModel.embedding.is_not(None))
+                .order_by(text("distance"))
+                .limit(top_k)
+            )
+            if filters is not None:
+                stmt = stmt.where(*self._filter_clauses(filters))
+            return stmt
+
+        if self._quantization == "halfvec":
+            half = HALFVEC(EMBEDDING_DIMENSION)
+            approx = cast(ChunkModel.embedding, half).op("<=>")(cast(query, half))
+        else:
+            bits = BIT(EMBEDDING_DIMENSION)
+            approx = cast(func.binary_quantize(ChunkModel.embedding), bits).op("<~>")(
+                func.binary_quantize(query)
+            )
+        candidates = (
+            select(*_CHUNK_COLUMNS, ChunkModel.embedding)
+            .where(ChunkModel.embedding.is_not(None))
+            .order_by(approx)
+            .limit(self._candidate_limit(top_k))
+        )
+        if filters is not None:
+            candidates = candidates.where(*self._filter_clauses(filters))
+        candidates = candidates.lateral("candidates")
+        distance = candidates.c.embedding.cosine_distance(query).label("distance")
+        columns = [c for c in candidates.c if c.name != "embedding"]
+        return select(*columns, distance).order_by(text("distance")).limit(top_k)
+
+    def _filter_clauses(self, filters: RetrievalFilter) -> list:
+        """document_id memakai index btree, metadata @> memakai index GIN."""
+        clauses = []
+        if filters.document_ids is not None:
+            clauses.append(ChunkModel.document_id.in_([str(d) for d in filters.document_ids]))
+        if filters.metadata:
+            clauses.append(ChunkModel.metadata_.contains(filters.metadata))
+        return clauses
+
+    async def _apply_search_settings(self, top_k: int, filtered: bool = False) -> None:
+        """Set parameter index ANN untuk transaksi ini saja (set_config local)."""
+        params = {}
+        # HNSW tidak bisa mengembalikan lebih dari ef_search kandidat; di atas batas
+        # pgvector, sisa kandidat hanya bisa didapat lewat iterative scan
+        beyond_ef_limit = top_k > _HNSW_MAX_EF_SEARCH
+        if self._hnsw_ef_search is not None:
+            ef_search = min(max(self._hnsw_ef_search, top_k), _HNSW_MAX_EF_SEARCH)
+            params["hnsw.ef_search"] = str(ef_search)
+            if beyond_ef_limit and not self._iterative_scan:
+                logger.warning(
+                    f"HNSW candidate limit {top_k} > ef_search maksimum "
+                    f"{_HNSW_MAX_EF_SEARCH}; hasil bisa kurang dari limit "
+                    f"(aktifkan PGVECTOR_ITERATIVE_SCAN)"
+                )
+        if self._ivfflat_probes is not None:
+            params["ivfflat.probes"] = str(self._ivfflat_probes)
+        if (filtered or beyond_ef_limit) and self._iterative_scan:
+            # pgvector >= 0.8: lanjutkan scan index sampai top_k baris terpenuhi
+            params["hnsw.iterative_scan"] = self._iterative_scan
+            params["ivfflat.iterative_scan"] = "relaxed_order"
+        if not params:
+            return
+        calls = ", ".join(
+            f"set_config(:name{i}, :value{i}, true)" for i in range(len(params))
+        )
+        bind = {}
+        for i, (name, value) in enumerate(params.items()):
+            bind[f"name{i}"] = name
+            bind[f"value{i}"] = value
+        await self._session.execute(text(f"SELECT {calls}"), bind)
 
     async def get_by_hash(self, content_hash: str) -> Chunk | None:
         stmt = select(ChunkModel).where(ChunkModel.content_hash == content_hash)
@@ -75,6 +338,18 @@ class PostgresChunkRepository(IChunkRepository):
         db_model = result.scalar_one_or_none()
         return self._to_entity(db_model) if db_model else None
 
+    async def get_existing_hashes(self, content_hashes: list[str]) -> set[str]:
+        if not content_hashes:
+            return set()
+        # = ANY(array) agar jumlah hash tidak menentukan jumlah bind parameter
+        stmt = select(ChunkModel.content_hash).where(
+            ChunkModel.content_hash == func.any(
+                bindparam("hashes", list(content_hashes), type_=ARRAY(String(64)))
+            )
+        )
+        result = await self._session.execute(stmt)
+        return set(result.scalars().all())
+
     async def delete_by_document_id(self, document_id: UUID) -> int:
         stmt = delete(ChunkModel).where(ChunkModel.document_id == str(document_id))
         result = await self._session.execute(stmt)
@@ -88,10 +363,22 @@ class PostgresChunkRepository(IChunkRepository):
             chunk_index=entity.chunk_index,
             content_hash=entity.content_hash,
             embedding=entity.embedding,
+            term_frequencies=entity.term_frequencies,
             metadata_=entity.metadata,
             created_at=entity.created_at,
         )
 
+    def _row_to_entity(self, row: Row) -> Chunk:
+        return Chunk(
+            id=UUID(row.id),
+            document_id=UUID(row.document_id),
+            content=row.content,
+            chunk_index=row.chunk_index,
+            content_hash=row.content_hash,
+            metadata=row.metadata,
+            created_at=row.created_at,
+        )
+
     def _to_entity(self, model: ChunkModel) -> Chunk:
         return Chunk(
             id=UUID(model.id),
@@ -100,6 +387,7 @@ class PostgresChunkRepository(IChunkRepository):
             chunk_index=model.chunk_index,
             content_hash=model.content_hash,
             embedding=list(model.embedding) if model.embedding else None,
+            term_frequencies=model.term_frequencies,
             metadata=model.metadata_,
             created_at=model.created_at,
         )
@@ -2,12 +2,17 @@
 
 from uuid import UUID
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.entities.document import Document
-from app.domain.interfaces.document_repository import IDocumentRepository
-from app.infrastructure.database.models import DocumentModel
+from app.domain.interfaces.document_repository import (
+    DocumentCursor,
+    DocumentPage,
+    DocumentSummary,
+    IDocumentRepository,
+)
+from app.infrastructure.database.models import ChunkModel, DocumentModel
 
 
 class PostgresDocumentRepository(IDocumentRepository):
@@ -49,6 +54,47 @@ class PostgresDocumentRepository(IDocumentRepository):
         result = await self._session.execute(stmt)
         return [self._to_entity(m) for m in result.scalars().all()]
 
+    async def list_page(
+        self, limit: int = 20, after: DocumentCursor | None = None
+    ) -> DocumentPage:
+        # Satu query: halaman (index created_at, id), chunk count per dokumen
+        # (index chunks.document_id) dan total dokumen
+        chunk_count = (
+            select(func.count())
+            .where(ChunkModel.document_id == DocumentModel.id)
+            .correlate(DocumentModel)
+            .scalar_subquery()
+        )
+        total_stmt = select(func.count()).select_from(DocumentModel)
+        total = total_stmt.scalar_subquery()
+        stmt = (
+            select(DocumentModel, chunk_count.label("chunk_count"), total.label("total"))
+            .order_by(DocumentModel.created_at.desc(), DocumentModel.id.desc())
+            .limit(limit + 1)
+        )
+        if after is not None:
+            created_at, document_id = after
+            stmt = stmt.where(
+                tuple_(DocumentModel.created_at, DocumentModel.id)
+                < tuple_(
+                    created_at,
+                    str(document_id),
+                    types=(DocumentModel.created_at.type, DocumentModel.id.type),
+                )
+            )
+        rows = (await self._session.execute(stmt)).all()
+
+        items = [DocumentSummary(self._to_entity(row[0]), row.chunk_count) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1].document
+            next_cursor = (last.created_at, last.id)
+        if rows:
+            total_count = rows[0].total
+        else:
+            total_count = await self._session.scalar(total_stmt)
+        return DocumentPage(items=items, total=total_count, next_cursor=next_cursor)
+
     async def delete(self, document_id: UUID) -> bool:
         stmt = delete(DocumentModel).where(DocumentModel.id == str(document_id))
         result = await self._session.execute(stmt)
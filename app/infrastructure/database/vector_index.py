@@ -0,0 +1,151 @@
+"""Pengelolaan index ANN pgvector untuk `chunks.embedding`.
+
+Tipe index (HNSW atau IVFFlat) dan parameternya diambil dari settings.
+IVFFlat menghitung centroid dari data yang ada saat index dibuat, jadi
+`init_db` tidak membuatnya pada tabel kosong; jalankan
+`rebuild_vector_index.py` setelah bulk load.
+
+Dengan quantization, index dibuat atas ekspresi `embedding::halfvec` (2x
+lebih kecil) atau `binary_quantize(embedding)::bit` (32x); kolom tetap
+menyimpan vector float32 untuk re-scoring kandidat (lihat chunk repository).
+"""
+
+import logging
+import math
+from typing import Literal
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_NAME = "chunks_embedding_idx"
+
+EMBEDDING_DIMENSION = 1024
+
+VectorIndexType = Literal["hnsw", "ivfflat", "none"]
+Quantization = Literal["none", "halfvec", "binary"]
+
+# (ekspresi yang di-index, operator class); ekspresi harus sama persis dengan
+# yang dipakai query agar planner memakai index
+_INDEX_EXPRESSIONS: dict[str, tuple[str, str]] = {
+    "none": ("embedding", "vector_cosine_ops"),
+    "halfvec": (f"(embedding::halfvec({EMBEDDING_DIMENSION}))", "halfvec_cosine_ops"),
+    "binary": (f"(binary_quantize(embedding)::bit({EMBEDDING_DIMENSION}))", "bit_hamming_ops"),
+}
+
+
+def ivfflat_lists(settings: Settings, row_count: int) -> int:
+    """Jumlah lists IVFFlat; 0 di settings = rekomendasi pgvector dari jumlah rows."""
+    if settings.pgvector_ivfflat_lists > 0:
+        return settings.pgvector_ivfflat_lists
+    if row_count <= 1_000_000:
+        return max(row_count // 1000, 10)
+    return int(math.sqrt(row_count))
+
+
+def vector_index_ddl(
+    settings: Settings,
+    row_count: int,
+    index_type: VectorIndexType | None = None,
+    name: str = VECTOR_INDEX_NAME,
+    concurrently: bool = False,
+    quantization: Quantization | None = None,
+) -> str | None:
+    index_type = index_type or settings.pgvector_index_type
+    expression, opclass = _INDEX_EXPRESSIONS[quantization or settings.pgvector_quantization]
+    if index_type == "hnsw":
+        method = "hnsw"
+        params = (
+            f"m = {settings.pgvector_hnsw_m}, "
+            f"ef_construction = {settings.pgvector_hnsw_ef_construction}"
+        )
+    elif index_type == "ivfflat":
+        method = "ivfflat"
+        params = f"lists = {ivfflat_lists(settings, row_count)}"
+    else:
+        return None
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+        f"ON chunks USING {method} ({expression} {opclass}) WITH ({params})"
+    )
+
+
+async def _existing_index(conn: AsyncConnection) -> tuple[str, str] | None:
+    """(access method, definisi) index ANN yang sudah ada."""
+    result = await conn.execute(
+        text(
+            "SELECT am.amname, pg_get_indexdef(c.oid) FROM pg_class c "
+            "JOIN pg_am am ON am.oid = c.relam "
+            "WHERE c.relname = :name AND c.relkind = 'i'"
+        ),
+        {"name": VECTOR_INDEX_NAME},
+    )
+    row = result.first()
+    return (row[0], row[1]) if row is not None else None
+
+
+async def _row_count(conn: AsyncConnection) -> int:
+    result = await conn.execute(text("SELECT count(*) FROM chunks WHERE embedding IS NOT NULL"))
+    return int(result.scalar_one())
+
+
+async def ensure_vector_index(conn: AsyncConnection, settings: Settings) -> None:
+    """Buat index ANN jika belum ada; dipanggil dari `init_db`."""
+    index_type = settings.pgvector_index_type
+    existing = await _existing_index(conn)
+    if existing is not None:
+        method, definition = existing
+        _, opclass = _INDEX_EXPRESSIONS[settings.pgvector_quantization]
+        if method != index_type or opclass not in definition:
+            logger.warning(
+                f"Index {VECTOR_INDEX_NAME} ({method}, {definition}) tidak sesuai "
+                f"settings ({index_type}, {settings.pgvector_quantization}); "
+                "jalankan rebuild_vector_index.py"
+            )
+        return
+    if index_type == "none":
+        return
+
+    row_count = await _row_count(conn)
+    if index_type == "ivfflat" and row_count == 0:
+        logger.info("Tabel chunks kosong, index IVFFlat dibuat setelah data dimuat")
+        return
+    await conn.execute(text(vector_index_ddl(settings, row_count)))
+    logger.info(f"Vector index {VECTOR_INDEX_NAME} ({index_type}) created")
+
+
+async def rebuild_vector_index(
+    engine: AsyncEngine,
+    settings: Settings,
+    index_type: VectorIndexType | None = None,
+    quantization: Quantization | None = None,
+) -> int:
+    """Bangun ulang index ANN tanpa mengunci tulis (CREATE INDEX CONCURRENTLY).
+
+    Index baru dibuat dengan nama sementara, lalu menggantikan index lama.
+    Return jumlah rows yang di-index.
+    """
+    index_type = index_type or settings.pgvector_index_type
+    tmp_name = f"{VECTOR_INDEX_NAME}_new"
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        row_count = await _row_count(conn)
+        await conn.execute(
+            text("SELECT set_config('maintenance_work_mem', :value, false)"),
+            {"value": settings.pgvector_maintenance_work_mem},
+        )
+        # Sisa build CONCURRENTLY yang gagal meninggalkan index invalid
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {tmp_name}"))
+        ddl = vector_index_ddl(
+            settings, row_count, index_type, tmp_name, concurrently=True, quantization=quantization
+        )
+        if ddl is not None:
+            await conn.execute(text(ddl))
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_NAME}"))
+        if ddl is not None:
+            await conn.execute(text(f"ALTER INDEX {tmp_name} RENAME TO {VECTOR_INDEX_NAME}"))
+        await conn.execute(text("ANALYZE chunks"))
+    return row_count
@@ -0,0 +1,141 @@
+"""Cache embedding query dua level: LRU in-process + Redis.
+
+Key cache: model embedding, input type, dan hash teks query yang sudah
+dinormalisasi (NFKC, whitespace dirapatkan, casefold); saat miss yang di-embed
+tetap teks asli query. Nilai disimpan sebagai
+float32 little-endian (4 byte/dimensi); di Redis di-encode base64 karena
+`ICacheService` bekerja dengan string. Embedding dokumen (ingest) tidak
+di-cache dan langsung diteruskan ke service di bawahnya.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+from app.domain.interfaces.cache_service import ICacheService
+from app.domain.interfaces.embedding_service import IEmbeddingService
+
+logger = logging.getLogger(__name__)
+
+_QUERY_INPUT_TYPE = "search_query"
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", query).split()).casefold()
+
+
+def _encode(embedding: list[float]) -> bytes:
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def _decode(data: bytes) -> list[float]:
+    return np.frombuffer(data, dtype="<f4").tolist()
+
+
+class CachedEmbeddingService(IEmbeddingService):
+    """Decorator `IEmbeddingService` dengan cache embedding query."""
+
+    def __init__(
+        self,
+        embedding_service: IEmbeddingService,
+        cache_service: ICacheService | None,
+        model: str,
+        max_entries: int = 10_000,
+        ttl: int = 86400,
+    ) -> None:
+        self._inner = embedding_service
+        self._cache = cache_service
+        self._model = model
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lru: OrderedDict[str, bytes] = OrderedDict()
+
+    @property
+    def embedding_dimension(self) -> int:
+        return self._inner.embedding_dimension
+
+    async def embed_text(self, text: str) -> list[float]:
+        return await self._inner.embed_text(text)
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        return await self._inner.embed_texts(texts)
+
+    async def embed_query(self, query: str) -> list[float]:
+        embeddings = await self.embed_queries([query])
+        return embeddings[0]
+
+    async def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        normalized = [normalize_query(q) for q in queries]
+        keys = [self._key(text) for text in normalized]
+        found: dict[str, bytes] = {}
+
+        for key in keys:
+            data = self._lru_get(key)
+            if data is not None:
+                found[key] = data
+
+        if self._cache is not None and self._ttl > 0:
+            remote_keys = [key for key in dict.fromkeys(keys) if key not in found]
+            values = await asyncio.gather(*(self._cache.get(key) for key in remote_keys))
+            for key, value in zip(remote_keys, values):
+                data = self._from_cache_value(key, value)
+                if data is not None:
+                    found[key] = data
+                    self._lru_put(key, data)
+
+        # Miss: embed sekali per key; teks asli query pertama dengan key itu
+        # (normalisasi hanya untuk key, bukan input model)
+        missing: dict[str, str] = {}
+        for key, query in zip(keys, queries):
+            if key not in found:
+                missing.setdefault(key, query)
+        if missing:
+            embeddings = await self._inner.embed_queries(list(missing.values()))
+            stored = []
+            for key, embedding in zip(missing, embeddings):
+                data = _encode(embedding)
+                found[key] = data
+                self._lru_put(key, data)
+                if self._cache is not None and self._ttl > 0:
+                    stored.append(
+                        self._cache.set(key, base64.b64encode(data).decode("ascii"), self._ttl)
+                    )
+            await asyncio.gather(*stored)
+
+        return [_decode(found[key]) for key in keys]
+
+    def _key(self, normalized: str) -> str:
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"embedding:{self._model}:{_QUERY_INPUT_TYPE}:{digest}"
+
+    def _lru_get(self, key: str) -> bytes | None:
+        data = self._lru.get(key)
+        if data is not None:
+            self._lru.move_to_end(key)
+        return data
+
+    def _lru_put(self, key: str, data: bytes) -> None:
+        if self._max_entries <= 0:
+            return
+        self._lru[key] = data
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._max_entries:
+            self._lru.popitem(last=False)
+
+    def _from_cache_value(self, key: str, value: object) -> bytes | None:
+        if not isinstance(value, str):
+            return None
+        try:
+            data = base64.b64decode(value, validate=True)
+        except (binascii.Error, ValueError):
+            logger.warning(f"Invalid cached embedding for key '{key}'")
+            return None
+        if len(data) != 4 * self.embedding_dimension:
+            return None
+        return data
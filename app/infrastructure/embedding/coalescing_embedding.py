@@ -0,0 +1,92 @@
+"""Coalescing embedding query dari request yang berjalan bersamaan.
+
+Query yang masuk dalam satu window pendek (default 5 ms) dikumpulkan dan
+dikirim sebagai satu request `embed_queries`; batch langsung dikirim jika
+sudah mencapai `max_batch`. Teks yang sama yang sedang menunggu atau sedang
+di-embed berbagi satu future, jadi tidak dikirim dua kali.
+"""
+
+import asyncio
+import logging
+
+from app.domain.interfaces.embedding_service import IEmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingEmbeddingService(IEmbeddingService):
+    """Decorator `IEmbeddingService` yang menggabungkan embedding query per window."""
+
+    def __init__(
+        self,
+        embedding_service: IEmbeddingService,
+        window: float = 0.005,
+        max_batch: int = 96,
+    ) -> None:
+        self._inner = embedding_service
+        self._window = window
+        self._max_batch = max_batch
+        self._pending: dict[str, asyncio.Future[list[float]]] = {}
+        self._in_flight: dict[str, asyncio.Future[list[float]]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def embedding_dimension(self) -> int:
+        return self._inner.embedding_dimension
+
+    async def embed_text(self, text: str) -> list[float]:
+        return await self._inner.embed_text(text)
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        return await self._inner.embed_texts(texts)
+
+    async def embed_query(self, query: str) -> list[float]:
+        future = self._pending.get(query) or self._in_flight.get(query)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[query] = future
+            if len(self._pending) >= self._max_batch:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self._window, self._flush)
+        # shield: caller yang dibatalkan tidak membatalkan hasil untuk caller lain
+        return list(await asyncio.shield(future))
+
+    async def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        return list(await asyncio.gather(*(self.embed_query(q) for q in queries)))
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self._in_flight.update(batch)
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: dict[str, asyncio.Future[list[float]]]) -> None:
+        try:
+            embeddings = await self._inner.embed_queries(list(batch))
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.warning(f"Coalesced embedding batch ({len(batch)} queries) failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Tandai sudah diambil agar tidak ada warning jika semua caller batal
+                    future.exception()
+        else:
+            for future, embedding in zip(batch.values(), embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        finally:
+            for query in batch:
+                self._in_flight.pop(query, None)
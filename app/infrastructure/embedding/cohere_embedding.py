@@ -1,9 +1,38 @@
-"""Cohere Embedding Service Implementation."""
+"""Cohere Embedding Service Implementation.
+
+Input dipecah per batch sesuai batas provider (96 teks per request), batch
+dikirim bersamaan dengan concurrency terbatas (semaphore bersama per service),
+batch yang di-throttle/gagal sementara di-retry dengan exponential backoff, dan
+hasil disusun kembali sesuai urutan input. Jika satu batch gagal permanen,
+batch lain dibatalkan.
+"""
+
+import asyncio
+import logging
+import random
 
 import cohere
+import httpx
+from cohere.errors import (
+    GatewayTimeoutError,
+    InternalServerError,
+    ServiceUnavailableError,
+    TooManyRequestsError,
+)
 
 from app.config import get_settings
 from app.domain.interfaces.embedding_service import IEmbeddingService
+from app.infrastructure.cohere_client import get_cohere_client
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_ERRORS = (
+    TooManyRequestsError,
+    ServiceUnavailableError,
+    GatewayTimeoutError,
+    InternalServerError,
+    httpx.TransportError,
+)
 
 
 class CohereEmbeddingService(IEmbeddingService):
@@ -13,11 +42,15 @@ class CohereEmbeddingService(IEmbeddingService):
         "embed-multilingual-light-v3.0": 384,
         "embed-english-light-v3.0": 384,
     }
+    # Batas jumlah teks per request embed Cohere
+    MAX_BATCH_SIZE = 96
 
-    def __init__(self, client: cohere.ClientV2 | None = None) -> None:
+    def __init__(self, client: cohere.AsyncClientV2 | None = None) -> None:
         self._settings = get_settings()
-        self._client = client or cohere.ClientV2(api_key=self._settings.cohere_api_key)
+        self._client = client or get_cohere_client()
         self._model = self._settings.embedding_model
+        self._batch_size = min(self._settings.embedding_batch_size, self.MAX_BATCH_SIZE)
+        self._semaphore = asyncio.Semaphore(self._settings.embedding_concurrency)
 
     @property
     def embedding_dimension(self) -> int:
@@ -28,21 +61,58 @@ class CohereEmbeddingService(IEmbeddingService):
         return embeddings[0]
 
     async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        return await self._embed(texts, "search_document")
+
+    async def embed_query(self, query: str) -> list[float]:
+        embeddings = await self._embed([query], "search_query")
+        return embeddings[0]
+
+    async def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        return await self._embed(queries, "search_query")
+
+    async def _embed(self, texts: list[str], input_type: str) -> list[list[float]]:
         if not texts:
             return []
-        response = self._client.embed(
-            texts=texts,
-            model=self._model,
-            input_type="search_document",
-            embedding_types=["float"],
-        )
-        return response.embeddings.float_
+        batches = [
+            texts[start : start + self._batch_size]
+            for start in range(0, len(texts), self._batch_size)
+        ]
+        tasks = [
+            asyncio.ensure_future(self._embed_batch(batch, input_type)) for batch in batches
+        ]
+        try:
+            # gather menjaga urutan hasil sesuai urutan batch
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Satu batch gagal permanen (atau caller batal): hentikan batch lain agar
+            # request yang sudah gagal tidak terus memakai quota provider
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return [embedding for batch in results for embedding in batch]
 
-    async def embed_query(self, query: str) -> list[float]:
-        response = self._client.embed(
-            texts=[query],
-            model=self._model,
-            input_type="search_query",
-            embedding_types=["float"],
-        )
-        return response.embeddings.float_[0]
+    async def _embed_batch(self, texts: list[str], input_type: str) -> list[list[float]]:
+        max_retries = self._settings.embedding_max_retries
+        for attempt in range(max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await self._client.embed(
+                        texts=texts,
+                        model=self._model,
+                        input_type=input_type,
+                        embedding_types=["float"],
+                    )
+                return response.embeddings.float_
+            except _RETRYABLE_ERRORS as e:
+                if attempt == max_retries:
+                    raise
+                # Exponential backoff + jitter, di luar semaphore agar slot dipakai batch lain
+                delay = self._settings.embedding_retry_base_delay * 2**attempt
+                delay *= random.uniform(0.5, 1.5)
+                logger.warning(
+                    f"Embedding batch ({len(texts)} texts) failed: {type(e).__name__}, "
+                    f"retry {attempt + 1}/{max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
@@ -0,0 +1,50 @@
+"""Local Embedding Service untuk load test tanpa Cohere.
+
+Embedding deterministik dari feature hashing token dan trigram karakter
+(signed, L2-normalized), jadi teks yang mirip secara leksikal tetap saling
+dekat dan retrieval menghasilkan ranking yang masuk akal.
+"""
+
+import hashlib
+import re
+
+import numpy as np
+
+from app.domain.interfaces.embedding_service import IEmbeddingService
+from app.infrastructure.local_provider import LatencyProfile
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class LocalEmbeddingService(IEmbeddingService):
+    def __init__(self, dimension: int = 1024, profile: LatencyProfile | None = None) -> None:
+        self._dimension = dimension
+        self._profile = profile or LatencyProfile()
+
+    @property
+    def embedding_dimension(self) -> int:
+        return self._dimension
+
+    async def embed_text(self, text: str) -> list[float]:
+        embeddings = await self.embed_texts([text])
+        return embeddings[0]
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        await self._profile.wait()
+        return [self._hash_embedding(text) for text in texts]
+
+    async def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        return await self.embed_texts(queries)
+
+    def _hash_embedding(self, text: str) -> list[float]:
+        vector = np.zeros(self._dimension, dtype=np.float32)
+        for token in _TOKEN_PATTERN.findall(text.lower()):
+            features = [token] + [f"#{token[i:i + 3]}" for i in range(len(token) - 2)]
+            for feature in features:
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vector[value % self._dimension] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
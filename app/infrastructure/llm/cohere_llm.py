@@ -6,6 +6,7 @@ import cohere
 
 from app.config import get_settings
 from app.domain.interfaces.llm_service import ILLMService
+from app.infrastructure.cohere_client import get_cohere_client
 
 
 class CohereLLMService(ILLMService):
@@ -18,9 +19,9 @@ ATURAN PENTING:
 4. Gunakan bahasa yang sama dengan pertanyaan user
 5. Berikan jawaban yang ringkas dan langsung ke inti"""
 
-    def __init__(self, client: cohere.ClientV2 | None = None) -> None:
+    def __init__(self, client: cohere.AsyncClientV2 | None = None) -> None:
         self._settings = get_settings()
-        self._client = client or cohere.ClientV2(api_key=self._settings.cohere_api_key)
+        self._client = client or get_cohere_client()
         self._model = self._settings.llm_model
 
     def _build_messages(
@@ -51,7 +52,7 @@ ATURAN PENTING:
         max_tokens: int = 1024,
     ) -> str:
         messages = self._build_messages(prompt, context, chat_history)
-        response = self._client.chat(
+        response = await self._client.chat(
             model=self._model,
             messages=messages,
             temperature=temperature,
@@ -74,6 +75,6 @@ ATURAN PENTING:
             temperature=temperature,
             max_tokens=max_tokens,
         )
-        for event in stream:
+        async for event in stream:
             if event.type == "content-delta":
                 yield event.delta.message.content.text
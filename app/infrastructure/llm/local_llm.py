@@ -0,0 +1,62 @@
+"""Local LLM Service untuk load test tanpa Cohere.
+
+Mengembalikan jawaban tetap (`LOCAL_PROVIDER_RESPONSE`) atau echo pertanyaan
+beserta ringkasan konteks; streaming dikirim per token dengan jeda per token.
+"""
+
+import asyncio
+from collections.abc import AsyncGenerator
+
+from app.domain.interfaces.llm_service import ILLMService
+from app.infrastructure.local_provider import LatencyProfile
+
+
+class LocalLLMService(ILLMService):
+    def __init__(
+        self,
+        profile: LatencyProfile | None = None,
+        response: str = "",
+        token_delay: float = 0.01,
+    ) -> None:
+        self._profile = profile or LatencyProfile()
+        self._response = response
+        self._token_delay = token_delay
+
+    def _answer(self, prompt: str, context: str | None, max_tokens: int) -> list[str]:
+        if self._response:
+            answer = self._response
+        else:
+            context_words = len(context.split()) if context else 0
+            answer = f"[local] {prompt} (konteks: {context_words} kata)"
+        # Token = kata beserta spasi di depannya, dibatasi max_tokens
+        words = answer.split(" ")[:max_tokens]
+        return [words[0]] + [f" {word}" for word in words[1:]]
+
+    async def generate(
+        self,
+        prompt: str,
+        context: str | None = None,
+        chat_history: list[dict] | None = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1024,
+    ) -> str:
+        await self._profile.wait()
+        tokens = self._answer(prompt, context, max_tokens)
+        if self._token_delay > 0:
+            await asyncio.sleep(self._token_delay * len(tokens))
+        return "".join(tokens)
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        context: str | None = None,
+        chat_history: list[dict] | None = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1024,
+    ) -> AsyncGenerator[str, None]:
+        # Latency profile = waktu sampai token pertama
+        await self._profile.wait()
+        for token in self._answer(prompt, context, max_tokens):
+            if self._token_delay > 0:
+                await asyncio.sleep(self._token_delay)
+            yield token
@@ -0,0 +1,37 @@
+"""Profil latency untuk provider lokal (pengganti Cohere saat load test).
+
+Setiap request menunggu `latency ± jitter` dan gagal dengan probabilitas
+`error_rate` (dilempar sebagai `TooManyRequestsError`, sama seperti Cohere
+saat throttled), sehingga throughput dan tail latency pipeline bisa diukur
+tanpa memanggil API.
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+
+from cohere.errors import TooManyRequestsError
+
+from app.config import Settings
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    latency: float = 0.05
+    jitter: float = 0.02
+    error_rate: float = 0.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "LatencyProfile":
+        return cls(
+            latency=settings.local_provider_latency_ms / 1000,
+            jitter=settings.local_provider_jitter_ms / 1000,
+            error_rate=settings.local_provider_error_rate,
+        )
+
+    async def wait(self) -> None:
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate > 0 and random.random() < self.error_rate:
+            raise TooManyRequestsError(body={"message": "simulated provider error"})
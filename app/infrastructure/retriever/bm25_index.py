@@ -0,0 +1,597 @@
+"""BM25 inverted index dengan posting lists NumPy.
+
+Setiap term menyimpan array doc slot (int32, terurut) dan term frequency
+(float32). Query hanya menyentuh postings dari term query dan skornya
+diakumulasi secara vectorized, sehingga biaya query sebanding dengan
+panjang postings, bukan ukuran corpus.
+
+Postings disimpan sebagai CSR (`_base_*`) plus overlay per term untuk term
+yang diubah oleh add/remove setelah build; `compact()` menggabungkan overlay
+kembali ke CSR. Scoring identik dengan `rank_bm25.BM25Okapi`.
+
+Top-k dipilih dengan argpartition (linear terhadap jumlah kandidat). Mode
+`early_termination` memakai MaxScore agar postings term umum tidak perlu
+di-scan penuh pada corpus besar.
+
+Setiap slot menyimpan key (chunk id) dan group (document id). Index bisa
+disimpan sebagai snapshot biner ber-versi (`save`, lihat `snapshot.py`) dan
+dibuka kembali dengan mmap (`load`): postings, forward index dan key dibaca
+langsung dari page cache sehingga beberapa worker berbagi satu salinan.
+"""
+
+import mmap
+import threading
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+import numpy as np
+
+from app.infrastructure.retriever.snapshot import (
+    SlotGroups,
+    SlotValues,
+    decode_strings,
+    encode_strings,
+    read_snapshot,
+    write_snapshot,
+)
+
+SNAPSHOT_VERSION = 2
+_SNAPSHOT_MAGIC = b"BM25SNAP"
+
+_EMPTY_IDS = np.zeros(0, dtype=np.int32)
+_EMPTY_TFS = np.zeros(0, dtype=np.float32)
+
+
+def _grow(arr: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(arr):
+        return arr
+    grown = np.zeros(max(size, 2 * len(arr), 16), dtype=arr.dtype)
+    grown[: len(arr)] = arr
+    return grown
+
+
+def _group_by_term(term_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stable sort by term; return (order, unique terms, group boundaries)."""
+    order = np.argsort(term_ids, kind="stable")
+    if len(order) == 0:
+        return order, term_ids, np.zeros(1, dtype=np.int64)
+    sorted_terms = term_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_terms[1:] != sorted_terms[:-1]])
+    bounds = np.r_[starts, len(sorted_terms)]
+    return order, sorted_terms[starts], bounds
+
+
+def _select_top_k(
+    slots: np.ndarray, scores: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Top-k linear (argpartition) dengan urutan (score desc, slot asc).
+
+    `slots` harus terurut naik agar tie di batas k diputus ke slot terkecil.
+    """
+    if len(scores) > k:
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[: k - len(above)]
+        selected = np.concatenate((above, ties))
+        slots, scores = slots[selected], scores[selected]
+    order = np.lexsort((slots, -scores))
+    return slots[order], scores[order]
+
+
+class BM25Index:
+    """Semua method publik thread-safe (RLock), index boleh dipakai bersama.
+
+    Slot hasil `search` bisa sudah dihapus saat `key()` dipanggil sesudahnya;
+    `key()` lalu mengembalikan None.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25) -> None:
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self._lock = threading.RLock()
+        self._mmap: mmap.mmap | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        # Fingerprint database saat index dibangun (lihat pipeline), ikut disimpan di
+        # snapshot; di-reset oleh add/remove karena isi index tidak lagi sesuai
+        self.fingerprint: str | None = None
+        self._vocab: dict[str, int] = {}
+        self._df = np.zeros(0, dtype=np.int32)
+
+        # Postings CSR + overlay untuk term yang berubah setelah build
+        self._base_offsets = np.zeros(1, dtype=np.int64)
+        self._base_ids = _EMPTY_IDS
+        self._base_tfs = _EMPTY_TFS
+        self._overlay: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+        # Forward index (slot -> term ids) untuk remove tanpa re-tokenize:
+        # CSR untuk slot hasil build, dict untuk slot yang ditambah setelahnya
+        self._fwd_offsets = np.zeros(1, dtype=np.int64)
+        self._fwd_terms = _EMPTY_IDS
+        self._fwd_extra: dict[int, np.ndarray] = {}
+
+        self._keys = SlotValues()
+        self._groups = SlotGroups()
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._num_docs = 0
+        self._total_len = 0.0
+
+        self._average_idf: float | None = None
+        self._doc_norm: np.ndarray | None = None
+        self._upper_bounds: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._num_docs
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return len(self._keys.find([key])) > 0
+
+    @property
+    def vocabulary_size(self) -> int:
+        with self._lock:
+            return int(np.count_nonzero(self._df))
+
+    def key(self, slot: int) -> str | None:
+        with self._lock:
+            return self._keys.get(slot)
+
+    def build(self, docs: Iterable[tuple[str, str, Mapping[str, int]]]) -> int:
+        """Reset index dan bangun CSR postings langsung dari corpus (streaming).
+
+        `docs` berisi (key, group, term frequencies).
+        """
+        with self._lock:
+            self._reset()
+            term_arr, tf_arr, slot_arr, sizes = self._append_docs(docs)
+
+            order = np.argsort(term_arr, kind="stable")
+            self._df = np.bincount(term_arr, minlength=len(self._vocab)).astype(np.int32)
+            self._base_offsets = np.zeros(len(self._vocab) + 1, dtype=np.int64)
+            np.cumsum(self._df, out=self._base_offsets[1:])
+            self._base_ids = slot_arr[order]
+            self._base_tfs = tf_arr[order]
+
+            self._fwd_offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=self._fwd_offsets[1:])
+            self._fwd_terms = term_arr
+            self._keys.freeze()
+            self._groups.freeze()
+            return self._num_docs
+
+    def add(self, docs: Iterable[tuple[str, str, Mapping[str, int]]]) -> int:
+        """Tambah dokumen (key, group, term frequencies); key yang sudah ada di-replace."""
+        batch = {key: (group, freqs) for key, group, freqs in docs}
+        if not batch:
+            return 0
+        with self._lock:
+            self.fingerprint = None
+            return self._add(batch)
+
+    def _add(self, batch: dict[str, tuple[str, Mapping[str, int]]]) -> int:
+        self._remove_slots(self._keys.find(batch))
+        start = len(self._keys)
+        term_arr, tf_arr, slot_arr, sizes = self._append_docs(
+            (key, group, freqs) for key, (group, freqs) in batch.items()
+        )
+        for i, terms in enumerate(np.split(term_arr, np.cumsum(sizes)[:-1])):
+            self._fwd_extra[start + i] = terms
+
+        self._df = _grow(self._df, len(self._vocab))
+        order, terms, bounds = _group_by_term(term_arr)
+        new_slots = slot_arr[order]
+        new_tfs = tf_arr[order]
+        for i, term_id in enumerate(terms.tolist()):
+            lo, hi = bounds[i], bounds[i + 1]
+            ids, term_tfs = self._postings(term_id)
+            # Slot baru selalu lebih besar, concat menjaga postings tetap terurut
+            self._overlay[term_id] = (
+                np.concatenate((ids, new_slots[lo:hi])),
+                np.concatenate((term_tfs, new_tfs[lo:hi])),
+            )
+            self._df[term_id] += hi - lo
+        return len(batch)
+
+    def _append_docs(
+        self, docs: Iterable[tuple[str, str, Mapping[str, int]]]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Alokasikan slot; return (term, tf, slot) per posting + jumlah term per slot.
+
+        Key yang muncul dua kali di `docs` hanya di-index sekali.
+        """
+        start = len(self._keys)
+        seen: set[str] = set()
+        # array.array menjaga memori build corpus besar tetap 4 byte per posting
+        term_ids = array("i")
+        tfs = array("i")
+        doc_sizes = array("q")
+        doc_lens = array("f")
+        for key, group, freqs in docs:
+            if key in seen:
+                continue
+            seen.add(key)
+            self._keys.append(key)
+            self._groups.append(group)
+            doc_len = 0
+            for term, tf in freqs.items():
+                term_id = self._vocab.get(term)
+                if term_id is None:
+                    term_id = self._vocab[term] = len(self._vocab)
+                term_ids.append(term_id)
+                tfs.append(tf)
+                doc_len += tf
+            doc_sizes.append(len(freqs))
+            doc_lens.append(doc_len)
+        end = len(self._keys)
+
+        term_arr = np.frombuffer(term_ids, dtype=np.int32).copy()
+        tf_arr = np.frombuffer(tfs, dtype=np.int32).astype(np.float32)
+        sizes = np.frombuffer(doc_sizes, dtype=np.int64)
+        slot_arr = np.repeat(np.arange(start, end, dtype=np.int32), sizes)
+
+        self._doc_len = _grow(self._doc_len, end)
+        self._doc_len[start:end] = np.frombuffer(doc_lens, dtype=np.float32)
+        self._total_len += float(self._doc_len[start:end].sum(dtype=np.float64))
+
+        self._num_docs += end - start
+        self._invalidate()
+        return term_arr, tf_arr, slot_arr, sizes
+
+    def remove(self, keys: Iterable[str]) -> int:
+        with self._lock:
+            self.fingerprint = None
+            return self._remove_slots(self._keys.find(keys))
+
+    def remove_groups(self, groups: Iterable[str]) -> int:
+        """Hapus semua slot milik group (mis. semua chunk satu dokumen)."""
+        with self._lock:
+            self.fingerprint = None
+            return self._remove_slots(self.group_slots(groups))
+
+    def group_slots(self, groups: Iterable[str]) -> np.ndarray:
+        """Slot aktif (terurut) milik group-group `groups`."""
+        with self._lock:
+            slots = self._groups.slots(groups)
+            return np.asarray(
+                [s for s in slots.tolist() if self._keys.get(s) is not None], np.int32
+            )
+
+    def key_slots(self, keys: Iterable[str]) -> np.ndarray:
+        with self._lock:
+            return self._keys.find(keys).astype(np.int32)
+
+    def _slot_terms(self, slot: int) -> np.ndarray:
+        if slot in self._fwd_extra:
+            return self._fwd_extra[slot]
+        return self._fwd_terms[self._fwd_offsets[slot] : self._fwd_offsets[slot + 1]]
+
+    def _remove_slots(self, slot_arr: np.ndarray) -> int:
+        if len(slot_arr) == 0:
+            return 0
+        slot_arr = slot_arr.astype(np.int32)
+        slot_terms = [self._slot_terms(slot) for slot in slot_arr.tolist()]
+        term_arr = np.concatenate(slot_terms)
+        owner = np.repeat(slot_arr, [len(t) for t in slot_terms])
+
+        order, terms, bounds = _group_by_term(term_arr)
+        owners = owner[order]
+        for i, term_id in enumerate(terms.tolist()):
+            lo, hi = bounds[i], bounds[i + 1]
+            ids, term_tfs = self._postings(term_id)
+            keep = np.ones(len(ids), dtype=bool)
+            keep[np.searchsorted(ids, owners[lo:hi])] = False
+            self._overlay[term_id] = (ids[keep], term_tfs[keep])
+            self._df[term_id] -= hi - lo
+
+        self._total_len -= float(self._doc_len[slot_arr].sum())
+        self._doc_len[slot_arr] = 0
+        self._keys.clear(slot_arr.tolist())
+        for slot in slot_arr.tolist():
+            self._fwd_extra.pop(slot, None)
+        self._num_docs -= len(slot_arr)
+        self._invalidate()
+        return len(slot_arr)
+
+    def postings(self, term_id: int) -> tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            return self._postings(term_id)
+
+    def _postings(self, term_id: int) -> tuple[np.ndarray, np.ndarray]:
+        if term_id in self._overlay:
+            return self._overlay[term_id]
+        if term_id + 1 >= len(self._base_offsets):
+            return _EMPTY_IDS, _EMPTY_TFS
+        lo, hi = self._base_offsets[term_id], self._base_offsets[term_id + 1]
+        return self._base_ids[lo:hi], self._base_tfs[lo:hi]
+
+    def compact(self) -> None:
+        """Gabungkan overlay, forward index dan slot tambahan ke array CSR."""
+        with self._lock:
+            self._compact_postings()
+            self._compact_forward()
+            self._keys.freeze()
+            self._groups.freeze()
+
+    def _compact_postings(self) -> None:
+        if not self._overlay:
+            return
+        vocab_size = len(self._vocab)
+        lengths = np.zeros(vocab_size, dtype=np.int64)
+        for term_id in range(vocab_size):
+            lengths[term_id] = len(self._postings(term_id)[0])
+        offsets = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        ids = np.empty(int(offsets[-1]), dtype=np.int32)
+        tfs = np.empty(int(offsets[-1]), dtype=np.float32)
+        for term_id in range(vocab_size):
+            term_ids, term_tfs = self._postings(term_id)
+            ids[offsets[term_id] : offsets[term_id + 1]] = term_ids
+            tfs[offsets[term_id] : offsets[term_id + 1]] = term_tfs
+        self._base_offsets, self._base_ids, self._base_tfs = offsets, ids, tfs
+        self._overlay = {}
+
+    def _compact_forward(self) -> None:
+        num_slots = len(self._keys)
+        if len(self._fwd_offsets) == num_slots + 1:
+            return
+        base_slots = len(self._fwd_offsets) - 1
+        extra = [
+            self._fwd_extra.get(slot, _EMPTY_IDS) for slot in range(base_slots, num_slots)
+        ]
+        sizes = np.array([len(t) for t in extra], dtype=np.int64)
+        offsets = np.empty(num_slots + 1, dtype=np.int64)
+        offsets[: base_slots + 1] = self._fwd_offsets
+        offsets[base_slots + 1 :] = self._fwd_offsets[-1] + np.cumsum(sizes)
+        self._fwd_terms = np.concatenate([self._fwd_terms, *extra]).astype(np.int32)
+        self._fwd_offsets = offsets
+        self._fwd_extra = {}
+
+    def save(self, path: str | Path) -> None:
+        """Tulis snapshot biner (lihat `snapshot.py`) setelah compact.
+
+        Lock hanya dipegang selama compact dan pengambilan array; file ditulis
+        di luar lock sehingga query tidak terblokir. Array hasil compact tidak
+        diubah in place oleh add/remove, kecuali df dan doc_len yang di-copy.
+        """
+        with self._lock:
+            self.compact()
+            num_slots = len(self._keys)
+            vocab_offsets, vocab_data = encode_strings(list(self._vocab))
+            sections = {
+                "vocab_offsets": vocab_offsets,
+                "vocab_data": vocab_data,
+                "df": self._df[: len(self._vocab)].copy(),
+                "postings_offsets": self._base_offsets,
+                "postings_ids": self._base_ids,
+                "postings_tfs": self._base_tfs,
+                "forward_offsets": self._fwd_offsets,
+                "forward_terms": self._fwd_terms,
+                "doc_len": self._doc_len[:num_slots].copy(),
+                "keys": self._keys.base,
+                "keys_order": self._keys.order,
+                **self._groups.arrays(),
+            }
+            meta = {
+                "k1": self.k1,
+                "b": self.b,
+                "epsilon": self.epsilon,
+                "num_docs": self._num_docs,
+                "total_len": self._total_len,
+                "fingerprint": self.fingerprint,
+            }
+        write_snapshot(path, _SNAPSHOT_MAGIC, SNAPSHOT_VERSION, meta, sections)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "BM25Index":
+        """Buka snapshot dengan mmap; array besar tidak di-copy ke heap."""
+        meta, arrays, mm = read_snapshot(path, _SNAPSHOT_MAGIC, SNAPSHOT_VERSION)
+        index = cls(k1=meta["k1"], b=meta["b"], epsilon=meta["epsilon"])
+        terms = decode_strings(arrays["vocab_offsets"], arrays["vocab_data"])
+        index._vocab = {term: i for i, term in enumerate(terms)}
+        # df dan doc_len di-update in place oleh add/remove: copy (kecil)
+        index._df = arrays["df"].copy()
+        index._doc_len = arrays["doc_len"].copy()
+        index._base_offsets = arrays["postings_offsets"]
+        index._base_ids = arrays["postings_ids"]
+        index._base_tfs = arrays["postings_tfs"]
+        index._fwd_offsets = arrays["forward_offsets"]
+        index._fwd_terms = arrays["forward_terms"]
+        index._keys = SlotValues(arrays["keys"], arrays.get("keys_order"))
+        index._groups = SlotGroups.from_arrays(arrays)
+        index._num_docs = meta["num_docs"]
+        index._total_len = meta["total_len"]
+        index.fingerprint = meta.get("fingerprint")
+        index._mmap = mm
+        return index
+
+    def _invalidate(self) -> None:
+        self._average_idf = None
+        self._doc_norm = None
+        self._upper_bounds = {}
+
+    def _idf(self, term_id: int) -> float:
+        n = self._num_docs
+        df = int(self._df[term_id])
+        idf = float(np.log(n - df + 0.5) - np.log(df + 0.5))
+        if idf >= 0:
+            return idf
+        # Sama seperti BM25Okapi: idf negatif diganti epsilon * rata-rata idf
+        if self._average_idf is None:
+            dfs = self._df[self._df > 0].astype(np.float64)
+            self._average_idf = float(np.mean(np.log(n - dfs + 0.5) - np.log(dfs + 0.5)))
+        return self.epsilon * self._average_idf
+
+    def _norms(self) -> np.ndarray:
+        """k1 * (1 - b + b * dl / avgdl) per slot, di-cache sampai index berubah."""
+        if self._doc_norm is None:
+            avgdl = self._total_len / self._num_docs
+            doc_len = self._doc_len[: len(self._keys)].astype(np.float64)
+            self._doc_norm = self.k1 * (1 - self.b + self.b * doc_len / avgdl)
+        return self._doc_norm
+
+    def _query_term_ids(self, query_terms: list[str]) -> list[int]:
+        term_ids = [self._vocab.get(term) for term in query_terms]
+        return [t for t in term_ids if t is not None and self._df[t] > 0]
+
+    def _contributions(self, term_id: int, ids: np.ndarray, tfs: np.ndarray) -> np.ndarray:
+        tfs64 = tfs.astype(np.float64)
+        return self._idf(term_id) * (tfs64 * (self.k1 + 1) / (tfs64 + self._norms()[ids]))
+
+    def _upper_bound(self, term_id: int) -> float:
+        """Kontribusi maksimum term, di-cache sampai index berubah."""
+        if term_id not in self._upper_bounds:
+            ids, tfs = self._postings(term_id)
+            self._upper_bounds[term_id] = float(self._contributions(term_id, ids, tfs).max())
+        return self._upper_bounds[term_id]
+
+    def get_scores(self, query_terms: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Skor BM25 untuk kandidat saja: return (slots, scores)."""
+        with self._lock:
+            return self._get_scores(query_terms)
+
+    def _get_scores(self, query_terms: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        if self._num_docs == 0 or self._total_len == 0:
+            return _EMPTY_IDS, np.zeros(0)
+        term_ids = self._query_term_ids(query_terms)
+        if not term_ids:
+            return _EMPTY_IDS, np.zeros(0)
+
+        contributions: dict[int, np.ndarray] = {}
+        slot_parts: list[np.ndarray] = []
+        score_parts: list[np.ndarray] = []
+        # Term duplikat dijumlah per kemunculan, urutan operasi sama dengan BM25Okapi
+        for term_id in term_ids:
+            ids, tfs = self._postings(term_id)
+            if term_id not in contributions:
+                contributions[term_id] = self._contributions(term_id, ids, tfs)
+            slot_parts.append(ids)
+            score_parts.append(contributions[term_id])
+
+        if len(slot_parts) == 1:
+            return slot_parts[0], score_parts[0]
+        all_slots = np.concatenate(slot_parts)
+        all_scores = np.concatenate(score_parts)
+        num_slots = len(self._keys)
+        if len(all_slots) * 4 > num_slots:
+            # Postings padat: akumulasi dense O(P + N) lebih murah dari sort
+            touched = np.flatnonzero(np.bincount(all_slots, minlength=num_slots))
+            scores = np.bincount(all_slots, weights=all_scores, minlength=num_slots)
+            return touched.astype(np.int32), scores[touched]
+        slots, inverse = np.unique(all_slots, return_inverse=True)
+        scores = np.bincount(inverse, weights=all_scores)
+        return slots.astype(np.int32), scores
+
+    def search(
+        self,
+        query_terms: list[str],
+        top_k: int,
+        early_termination: bool = False,
+        slots: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k (slots, scores) terurut score desc, slot asc.
+
+        `slots` (terurut) membatasi scoring ke slot tersebut, mis. hasil
+        `group_slots` untuk query yang di-scope ke beberapa dokumen.
+        """
+        with self._lock:
+            if slots is not None:
+                return _select_top_k(*self._scoped_scores(query_terms, slots), top_k)
+            if early_termination:
+                result = self._search_max_score(query_terms, top_k)
+                if result is not None:
+                    return result
+            slots, scores = self._get_scores(query_terms)
+            return _select_top_k(slots, scores, top_k)
+
+    def _scoped_scores(
+        self, query_terms: list[str], allowed: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Skor BM25 hanya untuk slot `allowed`.
+
+        Per term, array yang lebih kecil (postings atau allowed) di-probe ke
+        array yang lebih besar dengan searchsorted, sehingga biaya sebanding
+        dengan min(postings, allowed) dan bukan panjang postings.
+        """
+        if self._num_docs == 0 or self._total_len == 0 or len(allowed) == 0:
+            return _EMPTY_IDS, np.zeros(0)
+        contributions: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        slot_parts: list[np.ndarray] = []
+        score_parts: list[np.ndarray] = []
+        for term_id in self._query_term_ids(query_terms):
+            if term_id not in contributions:
+                ids, tfs = self._postings(term_id)
+                if len(allowed) < len(ids):
+                    pos = np.minimum(np.searchsorted(ids, allowed), len(ids) - 1)
+                    hit = pos[ids[pos] == allowed]
+                else:
+                    pos = np.minimum(np.searchsorted(allowed, ids), len(allowed) - 1)
+                    hit = np.flatnonzero(allowed[pos] == ids)
+                ids, tfs = ids[hit], tfs[hit]
+                contributions[term_id] = (ids, self._contributions(term_id, ids, tfs))
+            ids, scores = contributions[term_id]
+            slot_parts.append(ids)
+            score_parts.append(scores)
+
+        if not slot_parts:
+            return _EMPTY_IDS, np.zeros(0)
+        slots, inverse = np.unique(np.concatenate(slot_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        return slots.astype(np.int32), scores
+
+    def _search_max_score(
+        self, query_terms: list[str], top_k: int
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """MaxScore term-at-a-time; None jika mode exhaustive harus dipakai.
+
+        Term diproses dari upper bound terbesar. Begitu sisa upper bound lebih
+        kecil dari skor ke-k saat ini, dokumen baru tidak mungkin masuk top-k:
+        postings term sisanya hanya di-probe (searchsorted) untuk kandidat.
+        """
+        if self._num_docs == 0 or self._total_len == 0:
+            return None
+        counts = Counter(self._query_term_ids(query_terms))
+        # Kontribusi negatif (idf floor negatif) merusak monotonicity MaxScore
+        if len(counts) < 2 or any(self._idf(t) < 0 for t in counts):
+            return None
+
+        bounds = {t: count * self._upper_bound(t) for t, count in counts.items()}
+        order = sorted(counts, key=bounds.__getitem__, reverse=True)
+        remaining = sum(bounds.values())
+        cand_slots, cand_scores = _EMPTY_IDS, np.zeros(0)
+        threshold = -np.inf
+
+        processed = 0
+        for term_id in order:
+            if len(cand_scores) >= top_k and remaining < threshold:
+                break
+            ids, tfs = self._postings(term_id)
+            if (len(cand_slots) + len(ids)) * 4 > len(self._keys):
+                # Kandidat sudah padat: scoring dense exhaustive lebih murah
+                return None
+            contrib = counts[term_id] * self._contributions(term_id, ids, tfs)
+            cand_slots, inverse = np.unique(
+                np.concatenate((cand_slots, ids)), return_inverse=True
+            )
+            cand_scores = np.bincount(inverse, weights=np.concatenate((cand_scores, contrib)))
+            remaining -= bounds[term_id]
+            processed += 1
+            if len(cand_scores) >= top_k:
+                threshold = np.partition(cand_scores, len(cand_scores) - top_k)[-top_k]
+
+        for term_id in order[processed:]:
+            viable = cand_scores + remaining >= threshold
+            cand_slots, cand_scores = cand_slots[viable], cand_scores[viable]
+            ids, tfs = self._postings(term_id)
+            pos = np.minimum(np.searchsorted(ids, cand_slots), len(ids) - 1)
+            hit = ids[pos] == cand_slots
+            cand_scores[hit] += counts[term_id] * self._contributions(
+                term_id, cand_slots[hit], tfs[pos[hit]]
+            )
+            remaining -= bounds[term_id]
+
+        return _select_top_k(cand_slots.astype(np.int32), cand_scores, top_k)
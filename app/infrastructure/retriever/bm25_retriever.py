@@ -1,45 +1,117 @@
-"""BM25 Retriever Implementation."""
+"""BM25 Retriever Implementation.
 
-from rank_bm25 import BM25Okapi
+Retriever per-request di atas `BM25Index` bersama (process-wide). Index hanya
+menyimpan statistik term dan chunk id; isi chunk untuk hasil top-k diambil
+dari repository, sehingga worker tidak perlu menyimpan seluruh corpus di
+memori dan index bisa dibuka dari snapshot mmap. Ranking identik dengan
+`rank_bm25.BM25Okapi`.
+
+Scoring CPU-bound dijalankan di worker thread agar tidak memblok event loop.
+"""
+
+import asyncio
+from collections.abc import Iterable, Iterator, Mapping
+from uuid import UUID
+
+import numpy as np
 
 from app.domain.entities.chunk import Chunk
-from app.domain.interfaces.retriever_service import IRetrieverService, RetrievalResult
+from app.domain.interfaces.chunk_repository import IChunkRepository
+from app.domain.interfaces.retriever_service import (
+    IRetrieverService,
+    RetrievalFilter,
+    RetrievalResult,
+)
+from app.infrastructure.retriever.bm25_index import BM25Index
+from app.infrastructure.retriever.filtering import allowed_slots
+from app.infrastructure.retriever.tokenizer import term_frequencies, tokenize
+
+
+def index_entries(chunks: Iterable[Chunk]) -> Iterator[tuple[str, str, Mapping[str, int]]]:
+    """Entry (chunk id, document id, term frequencies) untuk `BM25Index`."""
+    for chunk in chunks:
+        # Term frequencies dari ingest; chunk lama tanpa statistik di-tokenize ulang
+        freqs = chunk.term_frequencies
+        if freqs is None:
+            freqs = term_frequencies(chunk.content)
+        yield str(chunk.id), str(chunk.document_id), freqs
 
 
 class BM25Retriever(IRetrieverService):
-    def __init__(self, chunks: list[Chunk] | None = None) -> None:
-        self._chunks: list[Chunk] = []
-        self._bm25: BM25Okapi | None = None
-        self._tokenized_corpus: list[list[str]] = []
-        if chunks:
-            self.build_index(chunks)
-
-    def build_index(self, chunks: list[Chunk]) -> None:
-        self._chunks = chunks
-        self._tokenized_corpus = [self._tokenize(c.content) for c in chunks]
-        if self._tokenized_corpus:
-            self._bm25 = BM25Okapi(self._tokenized_corpus)
-
-    def _tokenize(self, text: str) -> list[str]:
-        text = text.lower()
-        words = text.split()
-        return [w for w in words if len(w) > 1]
-
-    async def retrieve(self, query: str, top_k: int = 5) -> list[RetrievalResult]:
-        if self._bm25 is None or not self._chunks:
+    def __init__(
+        self,
+        index: BM25Index,
+        chunk_repository: IChunkRepository,
+        early_termination: bool = False,
+    ) -> None:
+        self._index = index
+        self._chunk_repo = chunk_repository
+        self._early_termination = early_termination
+
+    async def retrieve(
+        self, query: str, top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[RetrievalResult]:
+        if len(self._index) == 0:
             return []
 
-        tokenized_query = self._tokenize(query)
+        tokenized_query = tokenize(query)
         if not tokenized_query:
             return []
 
-        scores = self._bm25.get_scores(tokenized_query)
-        scored_indices = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)[:top_k]
+        slots = await allowed_slots(self._index, self._chunk_repo, filters)
+        if slots is not None and len(slots) == 0:
+            return []
+
+        hits = await asyncio.to_thread(self._search, tokenized_query, top_k, slots)
+        if not hits:
+            return []
+
+        chunks = {c.id: c for c in await self._chunk_repo.get_by_ids([i for i, _ in hits])}
+        # Chunk yang sudah dihapus dari database (mis. oleh worker lain) dilewati
+        return [
+            RetrievalResult(chunk=chunks[chunk_id], score=score, source="bm25")
+            for chunk_id, score in hits
+            if chunk_id in chunks
+        ]
+
+    async def retrieve_many(
+        self, queries: list[str], top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[list[RetrievalResult]]:
+        """Scoring semua query dalam satu worker thread, hydrate sekali."""
+        empty: list[list[RetrievalResult]] = [[] for _ in queries]
+        if len(self._index) == 0:
+            return empty
+        slots = await allowed_slots(self._index, self._chunk_repo, filters)
+        if slots is not None and len(slots) == 0:
+            return empty
+
+        tokenized = [tokenize(q) for q in queries]
+        all_hits = await asyncio.to_thread(
+            lambda: [self._search(t, top_k, slots) if t else [] for t in tokenized]
+        )
+        chunk_ids = list({chunk_id for hits in all_hits for chunk_id, _ in hits})
+        if not chunk_ids:
+            return empty
+
+        chunks = {c.id: c for c in await self._chunk_repo.get_by_ids(chunk_ids)}
+        return [
+            [
+                RetrievalResult(chunk=chunks[chunk_id], score=score, source="bm25")
+                for chunk_id, score in hits
+                if chunk_id in chunks
+            ]
+            for hits in all_hits
+        ]
 
-        results = []
-        for idx, score in scored_indices:
-            if score > 0:
-                results.append(
-                    RetrievalResult(chunk=self._chunks[idx], score=float(score), source="bm25")
-                )
-        return results
+    def _search(
+        self, tokenized_query: list[str], top_k: int, allowed: np.ndarray | None = None
+    ) -> list[tuple[UUID, float]]:
+        slots, scores = self._index.search(
+            tokenized_query, top_k, early_termination=self._early_termination, slots=allowed
+        )
+        hits = []
+        for slot, score in zip(slots.tolist(), scores.tolist()):
+            key = self._index.key(slot)
+            if score > 0 and key is not None:
+                hits.append((UUID(key), score))
+        return hits
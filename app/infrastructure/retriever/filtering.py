@@ -0,0 +1,36 @@
+"""Resolusi `RetrievalFilter` menjadi slot index in-process.
+
+Filter dokumen dijawab langsung dari daftar slot per dokumen yang sudah
+dihitung di index (CSR, lihat `SlotGroups`). Filter metadata di-resolve ke
+chunk id lewat repository (index GIN `chunks.metadata`), lalu ke slot.
+"""
+
+from collections.abc import Iterable
+from typing import Protocol
+
+import numpy as np
+
+from app.domain.interfaces.chunk_repository import IChunkRepository
+from app.domain.interfaces.retriever_service import RetrievalFilter
+
+
+class SlotIndex(Protocol):
+    def group_slots(self, groups: Iterable[str]) -> np.ndarray: ...
+
+    def key_slots(self, keys: Iterable[str]) -> np.ndarray: ...
+
+
+async def allowed_slots(
+    index: SlotIndex,
+    chunk_repository: IChunkRepository,
+    filters: RetrievalFilter | None,
+) -> np.ndarray | None:
+    """Slot terurut yang boleh di-score; None jika tidak ada filter."""
+    if filters is None or filters.is_empty:
+        return None
+    if filters.metadata:
+        chunk_ids = await chunk_repository.get_ids_by_filter(filters)
+        slots = index.key_slots(str(c) for c in chunk_ids)
+    else:
+        slots = index.group_slots(str(d) for d in filters.document_ids)
+    return np.sort(slots)
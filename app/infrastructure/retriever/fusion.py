@@ -0,0 +1,82 @@
+"""Fusion beberapa ranked list menjadi satu ranking.
+
+Metode:
+- "rrf": Reciprocal Rank Fusion, weight / (rrf_k + rank)
+- "combsum": jumlah weight * score asli
+- "normalized": jumlah weight * score yang di-normalisasi min-max per list
+
+Skor diakumulasi di array NumPy yang di-index per chunk id (satu dict lookup
+per item); `RetrievalResult` hanya dibuat untuk hasil top-k.
+"""
+
+from collections.abc import Sequence
+from typing import Literal
+
+import numpy as np
+
+from app.domain.entities.chunk import Chunk
+from app.domain.interfaces.retriever_service import RetrievalResult
+
+FusionMethod = Literal["rrf", "combsum", "normalized"]
+
+
+def _list_contributions(
+    results: list[RetrievalResult], method: FusionMethod, rrf_k: int
+) -> np.ndarray:
+    if method == "rrf":
+        return 1.0 / (rrf_k + np.arange(1, len(results) + 1, dtype=np.float64))
+    scores = np.fromiter((r.score for r in results), dtype=np.float64, count=len(results))
+    if method == "normalized":
+        low, high = scores.min(), scores.max()
+        if high > low:
+            return (scores - low) / (high - low)
+        return np.ones_like(scores)
+    return scores
+
+
+def fuse(
+    ranked_lists: Sequence[list[RetrievalResult]],
+    weights: Sequence[float] | None = None,
+    method: FusionMethod = "rrf",
+    rrf_k: int = 60,
+    top_k: int | None = None,
+) -> list[RetrievalResult]:
+    """Gabungkan ranked lists; tie diputus ke chunk yang pertama muncul."""
+    if weights is None:
+        weights = [1.0] * len(ranked_lists)
+    if len(weights) != len(ranked_lists):
+        raise ValueError("Jumlah weights harus sama dengan jumlah ranked lists")
+    if method not in ("rrf", "combsum", "normalized"):
+        raise ValueError(f"Fusion method tidak dikenal: {method}")
+
+    positions: dict[object, int] = {}
+    chunks: list[Chunk] = []
+    index_parts: list[np.ndarray] = []
+    score_parts: list[np.ndarray] = []
+    for results, weight in zip(ranked_lists, weights):
+        if not results or weight == 0:
+            continue
+        indices = np.empty(len(results), dtype=np.int64)
+        for i, result in enumerate(results):
+            position = positions.setdefault(result.chunk.id, len(chunks))
+            if position == len(chunks):
+                chunks.append(result.chunk)
+            indices[i] = position
+        index_parts.append(indices)
+        score_parts.append(weight * _list_contributions(results, method, rrf_k))
+
+    if not chunks:
+        return []
+
+    scores = np.bincount(
+        np.concatenate(index_parts),
+        weights=np.concatenate(score_parts),
+        minlength=len(chunks),
+    )
+    order = np.lexsort((np.arange(len(chunks)), -scores))
+    if top_k is not None:
+        order = order[:top_k]
+    return [
+        RetrievalResult(chunk=chunks[i], score=float(scores[i]), source="hybrid")
+        for i in order.tolist()
+    ]
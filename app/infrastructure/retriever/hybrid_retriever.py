@@ -1,63 +1,104 @@
-"""Hybrid Retriever Implementation with RRF fusion."""
+"""Hybrid Retriever Implementation with weighted fusion.
 
-from app.domain.interfaces.retriever_service import IRetrieverService, RetrievalResult
+Semua branch (mis. lexical dan vector) dijalankan bersamaan, masing-masing
+dengan timeout sendiri; branch yang timeout dianggap kosong sehingga latency
+hybrid kira-kira max(branch), bukan jumlahnya. Hasil digabung dengan RRF,
+CombSUM atau normalized-score fusion (lihat `fusion.py`). Filter dokumen/
+metadata diteruskan ke setiap branch. Karena berjalan bersamaan, retriever
+setiap branch harus memakai session database sendiri.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Sequence
+from dataclasses import dataclass
+
+from app.domain.interfaces.retriever_service import (
+    IRetrieverService,
+    RetrievalFilter,
+    RetrievalResult,
+)
+from app.infrastructure.retriever.fusion import FusionMethod, fuse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetrieverBranch:
+    """Satu retriever dalam hybrid retrieval."""
+    name: str
+    retriever: IRetrieverService
+    weight: float = 1.0
+    timeout: float | None = None
 
 
 class HybridRetriever(IRetrieverService):
     def __init__(
         self,
-        bm25_retriever: IRetrieverService,
-        vector_retriever: IRetrieverService,
+        branches: Sequence[RetrieverBranch],
+        fusion_method: FusionMethod = "rrf",
         rrf_k: int = 60,
     ) -> None:
-        self._bm25 = bm25_retriever
-        self._vector = vector_retriever
+        self._branches = list(branches)
+        self._fusion_method = fusion_method
         self._rrf_k = rrf_k
 
-    async def retrieve(self, query: str, top_k: int = 5) -> list[RetrievalResult]:
+    async def retrieve(
+        self, query: str, top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[RetrievalResult]:
         fetch_k = top_k * 2
-        bm25_results = await self._bm25.retrieve(query, fetch_k)
-        vector_results = await self._vector.retrieve(query, fetch_k)
-        fused_results = self._rrf_fusion(bm25_results, vector_results)
-
-        sorted_results = sorted(fused_results.values(), key=lambda x: x.score, reverse=True)
-        return sorted_results[:top_k]
-
-    def _rrf_fusion(
-        self,
-        bm25_results: list[RetrievalResult],
-        vector_results: list[RetrievalResult],
-    ) -> dict[str, RetrievalResult]:
-        fused: dict[str, RetrievalResult] = {}
-
-        for rank, result in enumerate(bm25_results, start=1):
-            chunk_id = str(result.chunk.id)
-            rrf_score = 1 / (self._rrf_k + rank)
-
-            if chunk_id in fused:
-                fused[chunk_id] = RetrievalResult(
-                    chunk=result.chunk,
-                    score=fused[chunk_id].score + rrf_score,
-                    source="hybrid",
-                )
-            else:
-                fused[chunk_id] = RetrievalResult(
-                    chunk=result.chunk, score=rrf_score, source="hybrid"
+        ranked_lists = await asyncio.gather(
+            *(
+                self._run_branch(
+                    b.name, b.retriever.retrieve(query, fetch_k, filters), b.timeout
                 )
+                for b in self._branches
+            )
+        )
+        return fuse(
+            ranked_lists,
+            weights=[b.weight for b in self._branches],
+            method=self._fusion_method,
+            rrf_k=self._rrf_k,
+            top_k=top_k,
+        )
 
-        for rank, result in enumerate(vector_results, start=1):
-            chunk_id = str(result.chunk.id)
-            rrf_score = 1 / (self._rrf_k + rank)
-
-            if chunk_id in fused:
-                fused[chunk_id] = RetrievalResult(
-                    chunk=fused[chunk_id].chunk,
-                    score=fused[chunk_id].score + rrf_score,
-                    source="hybrid",
-                )
-            else:
-                fused[chunk_id] = RetrievalResult(
-                    chunk=result.chunk, score=rrf_score, source="hybrid"
+    async def retrieve_many(
+        self, queries: list[str], top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[list[RetrievalResult]]:
+        """Setiap branch menjalankan semua query sebagai satu batch."""
+        if not queries:
+            return []
+        fetch_k = top_k * 2
+        per_branch = await asyncio.gather(
+            *(
+                self._run_branch(
+                    b.name, b.retriever.retrieve_many(queries, fetch_k, filters), b.timeout
                 )
+                for b in self._branches
+            )
+        )
+        per_branch = [lists or [[] for _ in queries] for lists in per_branch]
+        weights = [b.weight for b in self._branches]
+        return [
+            fuse(
+                [lists[i] for lists in per_branch],
+                weights=weights,
+                method=self._fusion_method,
+                rrf_k=self._rrf_k,
+                top_k=top_k,
+            )
+            for i in range(len(queries))
+        ]
 
-        return fused
+    async def _run_branch(
+        self,
+        name: str,
+        branch: Awaitable[list],
+        timeout: float | None,
+    ) -> list:
+        try:
+            return await asyncio.wait_for(branch, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{name} retrieval timed out after {timeout}s, skipping branch")
+            return []
@@ -0,0 +1,133 @@
+"""Sinkronisasi update index retrieval antar worker lewat Redis pub/sub.
+
+Setiap worker uvicorn punya index in-process sendiri. Setelah commit, worker
+yang memproses ingest/delete meng-update index-nya lalu mem-publish event
+(add/remove per dokumen, atau refresh setelah `/reindex`). Worker lain
+menerapkan event yang sama: chunk dokumen dibaca ulang dari primary, refresh
+membuka snapshot terbaru (atau rebuild).
+
+Pub/sub tidak menyimpan pesan; worker yang terputus dari Redis me-reload
+index setelah tersambung kembali agar update yang terlewat ikut masuk.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
+from uuid import UUID, uuid4
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.domain.entities.chunk import Chunk
+from app.domain.interfaces.chunk_repository import IChunkRepository
+from app.domain.interfaces.retrieval_index import IRetrievalIndex
+
+logger = logging.getLogger(__name__)
+
+_CHANNEL = "retrieval_index:updates"
+_MAX_RECONNECT_DELAY = 30.0
+
+
+class RedisIndexSync:
+    def __init__(
+        self,
+        index: IRetrievalIndex,
+        open_repository: Callable[[], AbstractAsyncContextManager[IChunkRepository]],
+        reload: Callable[[], Awaitable[object]],
+        redis_url: str,
+        channel: str = _CHANNEL,
+    ) -> None:
+        self._index = index
+        self._open_repository = open_repository
+        self._reload = reload
+        self._client = redis.from_url(redis_url, decode_responses=True)
+        self._channel = channel
+        # Event dari worker ini sendiri diabaikan saat diterima kembali
+        self._origin = uuid4().hex
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._client.aclose()
+
+    async def publish(self, op: str, document_id: UUID | None = None) -> None:
+        message = {
+            "op": op,
+            "document_id": str(document_id) if document_id else None,
+            "origin": self._origin,
+        }
+        try:
+            await self._client.publish(self._channel, json.dumps(message))
+        except RedisError as e:
+            logger.warning(f"Index sync publish '{op}' failed: {e}")
+
+    async def _listen(self) -> None:
+        delay = 1.0
+        reconnected = False
+        while True:
+            try:
+                async with self._client.pubsub() as pubsub:
+                    await pubsub.subscribe(self._channel)
+                    if reconnected:
+                        await self._apply({"op": "refresh"})
+                    delay = 1.0
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            await self._handle(message["data"])
+            except (RedisError, OSError) as e:
+                logger.warning(f"Index sync disconnected: {e}, retry in {delay:.0f}s")
+                reconnected = True
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+
+    async def _handle(self, data: str) -> None:
+        try:
+            event = json.loads(data)
+        except ValueError:
+            logger.warning(f"Invalid index sync event: {data!r}")
+            return
+        if event.get("origin") == self._origin:
+            return
+        await self._apply(event)
+
+    async def _apply(self, event: dict) -> None:
+        op = event.get("op")
+        try:
+            if op == "add":
+                document_id = UUID(event["document_id"])
+                async with self._open_repository() as repository:
+                    chunks = await repository.get_by_document_id(document_id)
+                await self._index.add_chunks(chunks)
+            elif op == "remove":
+                await self._index.remove_document(UUID(event["document_id"]))
+            elif op == "refresh":
+                await self._reload()
+        except Exception as e:
+            # Satu event gagal tidak boleh menghentikan listener
+            logger.error(f"Index sync event '{op}' failed: {e}")
+
+
+class BroadcastRetrievalIndex(IRetrievalIndex):
+    """Decorator `IRetrievalIndex`: update index lokal lalu publish ke worker lain."""
+
+    def __init__(self, index: IRetrievalIndex, sync: RedisIndexSync) -> None:
+        self._index = index
+        self._sync = sync
+
+    async def add_chunks(self, chunks: list[Chunk]) -> None:
+        await self._index.add_chunks(chunks)
+        for document_id in dict.fromkeys(chunk.document_id for chunk in chunks):
+            await self._sync.publish("add", document_id)
+
+    async def remove_document(self, document_id: UUID) -> None:
+        await self._index.remove_document(document_id)
+        await self._sync.publish("remove", document_id)
@@ -0,0 +1,28 @@
+"""Update index retrieval yang ditunda sampai transaksi database di-commit.
+
+Index in-process tidak ikut transaksi; jika di-update sebelum commit dan
+commit gagal, index berisi chunk yang tidak ada di database (atau kehilangan
+chunk yang masih ada). Wrapper ini mendaftarkan update sebagai callback
+after-commit pada session request; update berjalan sebagai task setelah
+commit.
+"""
+
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.entities.chunk import Chunk
+from app.domain.interfaces.retrieval_index import IRetrievalIndex
+from app.infrastructure.database.connection import run_after_commit
+
+
+class PostCommitRetrievalIndex(IRetrievalIndex):
+    def __init__(self, index: IRetrievalIndex, session: AsyncSession) -> None:
+        self._index = index
+        self._session = session
+
+    async def add_chunks(self, chunks: list[Chunk]) -> None:
+        run_after_commit(self._session, lambda: self._index.add_chunks(chunks))
+
+    async def remove_document(self, document_id: UUID) -> None:
+        run_after_commit(self._session, lambda: self._index.remove_document(document_id))
@@ -0,0 +1,297 @@
+"""Format snapshot biner untuk index in-process (BM25, vector).
+
+Layout file: header `_HEADER` (magic, versi, panjang metadata) + metadata
+JSON, lalu section array yang di-align 64 byte. Metadata mencatat offset,
+dtype dan shape tiap section sehingga `read_snapshot` bisa membuat view
+langsung di atas mmap tanpa copy; beberapa proses yang membuka file yang
+sama berbagi satu salinan di page cache.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+_HEADER = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+def _aligned(size: int) -> int:
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def write_snapshot(
+    path: str | Path,
+    magic: bytes,
+    version: int,
+    meta: dict[str, Any],
+    sections: Mapping[str, np.ndarray],
+) -> None:
+    """Tulis snapshot ke file sementara unik, fsync, lalu atomic replace.
+
+    Setiap writer punya file sementara sendiri, jadi beberapa worker yang
+    menyimpan bersamaan tidak saling menimpa; yang terakhir replace menang.
+    """
+    path = Path(path)
+    meta = {**meta, "sections": {}}
+    # Offset section bergantung pada panjang metadata; ulangi sampai stabil
+    data_start = 0
+    while True:
+        offset = data_start
+        for name, arr in sections.items():
+            meta["sections"][name] = [offset, arr.dtype.str, list(arr.shape)]
+            offset += _aligned(arr.nbytes)
+        meta_bytes = json.dumps(meta).encode()
+        if _aligned(_HEADER.size + len(meta_bytes)) <= data_start:
+            break
+        data_start = _aligned(_HEADER.size + len(meta_bytes))
+
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(magic, version, len(meta_bytes)))
+            f.write(meta_bytes)
+            for name, arr in sections.items():
+                f.seek(meta["sections"][name][0])
+                f.write(np.ascontiguousarray(arr).tobytes())
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def temp_path(path: str | Path) -> Path:
+    """File sementara unik di direktori `path` (satu per writer/proses)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    os.close(fd)
+    return Path(name)
+
+
+def fsync_file(path: str | Path) -> None:
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def read_snapshot(
+    path: str | Path, magic: bytes, version: int
+) -> tuple[dict[str, Any], dict[str, np.ndarray], mmap.mmap]:
+    """Buka snapshot dengan mmap; return (metadata, array read-only, mmap).
+
+    mmap harus tetap direferensikan selama array dipakai.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        file_magic, file_version, meta_len = _HEADER.unpack_from(mm, 0)
+        if file_magic != magic:
+            raise ValueError(f"Bukan snapshot {magic.decode()}: {path}")
+        if file_version != version:
+            raise ValueError(f"Versi snapshot {file_version} tidak didukung: {path}")
+        meta = json.loads(mm[_HEADER.size : _HEADER.size + meta_len])
+        arrays = {}
+        for name, (offset, dtype, shape) in meta.pop("sections").items():
+            count = int(np.prod(shape))
+            arrays[name] = np.frombuffer(mm, dtype=dtype, count=count, offset=offset).reshape(
+                shape
+            )
+    except (struct.error, KeyError, TypeError, ValueError) as e:
+        mm.close()
+        if isinstance(e, ValueError):
+            raise
+        raise ValueError(f"Snapshot rusak: {path}") from e
+    return meta, arrays, mm
+
+
+def encode_strings(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Encode list string variable-length sebagai (offsets int64, bytes uint8)."""
+    encoded = [v.encode() for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def decode_strings(offsets: np.ndarray, data: np.ndarray) -> list[str]:
+    text = data.tobytes()
+    bounds = offsets.tolist()
+    return [text[lo:hi].decode() for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+class SlotValues:
+    """Nilai string per slot (key atau group).
+
+    Slot hasil build/snapshot disimpan sebagai array bytes fixed-width (bisa
+    read-only mmap) dengan urutan sort-nya, sehingga lookup adalah binary
+    search O(log N) per nilai tanpa dict Python sebesar corpus. Slot yang
+    ditambah setelahnya disimpan di list + dict kecil.
+    """
+
+    def __init__(self, base: np.ndarray | None = None, order: np.ndarray | None = None) -> None:
+        self._base = base if base is not None else np.zeros(0, dtype="S1")
+        self._order = order
+        self._extra: list[str | None] = []
+        self._extra_slots: dict[str, int] = {}
+        self._cleared: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._extra)
+
+    @property
+    def base(self) -> np.ndarray:
+        return self._base
+
+    @property
+    def order(self) -> np.ndarray:
+        """Permutasi yang mengurutkan `base` (dihitung sekali, disimpan di snapshot)."""
+        if self._order is None:
+            self._order = np.argsort(self._base, kind="stable")
+        return self._order
+
+    def get(self, slot: int) -> str | None:
+        if slot >= len(self._base):
+            return self._extra[slot - len(self._base)]
+        if slot in self._cleared:
+            return None
+        value = self._base[slot]
+        return value.decode() if value else None
+
+    def append(self, value: str) -> None:
+        self._extra_slots[value] = len(self)
+        self._extra.append(value)
+
+    def find(self, values: Iterable[str]) -> np.ndarray:
+        """Slot (terurut) yang nilainya ada di `values`."""
+        wanted = set(values)
+        if not wanted:
+            return np.zeros(0, dtype=np.int64)
+        slots: list[int] = []
+        width = self._base.dtype.itemsize
+        needles = [v.encode() for v in wanted if v and len(v.encode()) <= width]
+        if len(self._base) and needles:
+            needle_arr = np.array(needles, dtype=self._base.dtype)
+            order = self.order
+            pos = np.searchsorted(self._base, needle_arr, sorter=order)
+            found = pos < len(order)
+            candidates = order[pos[found]]
+            hits = candidates[self._base[candidates] == needle_arr[found]]
+            slots.extend(s for s in hits.tolist() if s not in self._cleared)
+        slots.extend(self._extra_slots[v] for v in wanted if v in self._extra_slots)
+        return np.asarray(sorted(slots), dtype=np.int64)
+
+    def clear(self, slots: Iterable[int]) -> None:
+        for slot in slots:
+            if slot >= len(self._base):
+                value = self._extra[slot - len(self._base)]
+                if value is not None and self._extra_slots.get(value) == slot:
+                    del self._extra_slots[value]
+                self._extra[slot - len(self._base)] = None
+            else:
+                self._cleared.add(slot)
+
+    def freeze(self) -> None:
+        """Gabungkan slot tambahan ke base array (slot terhapus jadi b"")."""
+        if not self._extra and not self._cleared:
+            return
+        values = [(self.get(slot) or "").encode() for slot in range(len(self))]
+        width = max((len(v) for v in values), default=1) or 1
+        self._base = np.array(values, dtype=f"S{width}")
+        self._order = None
+        self._extra = []
+        self._extra_slots = {}
+        self._cleared = set()
+
+
+class SlotGroups:
+    """Group per slot (mis. document id) dengan lookup group -> slots.
+
+    Slot hasil build/snapshot di-index sebagai CSR (slot terurut per group,
+    bisa mmap); slot yang ditambah setelahnya dicatat per group di dict.
+    Slot yang sudah dihapus tetap tercatat, pemanggil yang memfilter.
+    """
+
+    def __init__(
+        self,
+        names: list[str] | None = None,
+        slot_group: np.ndarray | None = None,
+        offsets: np.ndarray | None = None,
+        slots: np.ndarray | None = None,
+    ) -> None:
+        self._names = names or []
+        self._ids = {name: i for i, name in enumerate(self._names)}
+        self._slot_group = slot_group if slot_group is not None else np.zeros(0, dtype=np.int32)
+        self._offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self._slots = slots if slots is not None else np.zeros(0, dtype=np.int32)
+        self._extra_group: list[int] = []
+        self._extra: dict[int, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slot_group) + len(self._extra_group)
+
+    def append(self, name: str) -> None:
+        group_id = self._ids.get(name)
+        if group_id is None:
+            group_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        self._extra.setdefault(group_id, []).append(len(self))
+        self._extra_group.append(group_id)
+
+    def slots(self, names: Iterable[str]) -> np.ndarray:
+        """Slot (terurut) milik group-group `names`."""
+        parts = []
+        for name in set(names):
+            group_id = self._ids.get(name)
+            if group_id is None:
+                continue
+            if group_id + 1 < len(self._offsets):
+                lo, hi = self._offsets[group_id], self._offsets[group_id + 1]
+                parts.append(self._slots[lo:hi])
+            if group_id in self._extra:
+                parts.append(np.asarray(self._extra[group_id], dtype=np.int32))
+        if not parts:
+            return np.zeros(0, dtype=np.int32)
+        return np.sort(np.concatenate(parts))
+
+    def freeze(self) -> None:
+        """Bangun ulang CSR group -> slots termasuk slot tambahan."""
+        if not self._extra_group:
+            return
+        slot_group = np.concatenate(
+            (self._slot_group, np.asarray(self._extra_group, dtype=np.int32))
+        )
+        offsets = np.zeros(len(self._names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(slot_group, minlength=len(self._names)), out=offsets[1:])
+        self._slots = np.argsort(slot_group, kind="stable").astype(np.int32)
+        self._slot_group = slot_group
+        self._offsets = offsets
+        self._extra_group = []
+        self._extra = {}
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        """Section snapshot (setelah freeze)."""
+        self.freeze()
+        name_offsets, name_data = encode_strings(self._names)
+        return {
+            "group_name_offsets": name_offsets,
+            "group_name_data": name_data,
+            "slot_group": self._slot_group,
+            "group_offsets": self._offsets,
+            "group_slots": self._slots,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray]) -> "SlotGroups":
+        return cls(
+            names=decode_strings(arrays["group_name_offsets"], arrays["group_name_data"]),
+            slot_group=arrays["slot_group"],
+            offsets=arrays["group_offsets"],
+            slots=arrays["group_slots"],
+        )
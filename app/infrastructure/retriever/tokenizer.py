@@ -0,0 +1,18 @@
+"""Tokenizer lexical yang dipakai bersama oleh ingest dan index BM25.
+
+Term frequencies dihitung sekali saat ingest dan disimpan per chunk; index
+build memakai hasil tersimpan itu, jadi ingest dan query harus memakai
+tokenizer yang sama.
+"""
+
+from collections import Counter
+
+
+def tokenize(text: str) -> list[str]:
+    text = text.lower()
+    words = text.split()
+    return [w for w in words if len(w) > 1]
+
+
+def term_frequencies(text: str) -> dict[str, int]:
+    return dict(Counter(tokenize(text)))
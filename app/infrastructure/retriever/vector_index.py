@@ -0,0 +1,416 @@
+"""In-process vector index untuk cosine similarity.
+
+`VectorIndex` menyimpan embedding (ter-normalisasi) sebagai matrix float32
+contiguous dan mencari secara exact dengan satu matmul; cocok untuk corpus
+kecil-menengah. `HNSWVectorIndex` menambahkan graph HNSW (hnswlib) untuk
+pencarian approximate pada corpus besar.
+
+Matrix hasil build/snapshot bisa berupa mmap read-only; baris yang ditambah
+setelahnya disimpan di matrix terpisah, slot yang dihapus hanya ditandai.
+Skor sama dengan pgvector: 1 - cosine distance.
+"""
+
+import mmap
+import threading
+import uuid
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+from app.infrastructure.retriever.snapshot import (
+    SlotGroups,
+    SlotValues,
+    fsync_file,
+    read_snapshot,
+    temp_path,
+    write_snapshot,
+)
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+SNAPSHOT_VERSION = 2
+_SNAPSHOT_MAGIC = b"VECTSNAP"
+
+VectorEntry = tuple[str, str, Sequence[float]]
+
+# HNSW + filter: subset < count / ratio dicari exact, selain itu graph di-query
+# dengan k * oversample lalu di-filter
+_EXACT_FILTER_RATIO = 10
+_FILTER_OVERSAMPLE = 4
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class VectorIndex:
+    """Exact cosine search; semua method publik thread-safe (RLock).
+
+    Slot hasil `search` bisa sudah dihapus saat `key()` dipanggil sesudahnya;
+    `key()` lalu mengembalikan None.
+    """
+
+    def __init__(self, dimension: int) -> None:
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        self._mmap: mmap.mmap | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        # Fingerprint database saat index dibangun (lihat pipeline), ikut disimpan di
+        # snapshot; di-reset oleh add/remove karena isi index tidak lagi sesuai
+        self.fingerprint: str | None = None
+        self._base = np.zeros((0, self.dimension), dtype=np.float32)
+        self._extra = np.zeros((0, self.dimension), dtype=np.float32)
+        self._num_extra = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._keys = SlotValues()
+        self._groups = SlotGroups()
+        self._count = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return len(self._keys.find([key])) > 0
+
+    def key(self, slot: int) -> str | None:
+        with self._lock:
+            return self._keys.get(slot)
+
+    def build(self, entries: Iterable[VectorEntry]) -> int:
+        """Reset index dan isi dari (key, group, embedding); tanpa embedding dilewati."""
+        with self._lock:
+            self._reset()
+            self._append(entries)
+            self._base = self._extra[: self._num_extra].copy()
+            self._extra = np.zeros((0, self.dimension), dtype=np.float32)
+            self._num_extra = 0
+            self._keys.freeze()
+            self._groups.freeze()
+            return self._count
+
+    def add(self, entries: Iterable[VectorEntry]) -> int:
+        """Tambah embedding; key yang sudah ada di-replace."""
+        batch = {key: (group, embedding) for key, group, embedding in entries}
+        if not batch:
+            return 0
+        with self._lock:
+            self.fingerprint = None
+            self._remove_slots(self._keys.find(batch))
+            start = len(self._keys)
+            added = self._append((k, g, e) for k, (g, e) in batch.items())
+            self._on_added(np.arange(start, start + added))
+            return added
+
+    def _append(self, entries: Iterable[VectorEntry]) -> int:
+        rows = []
+        seen: set[str] = set()
+        for key, group, embedding in entries:
+            if embedding is None or key in seen:
+                continue
+            row = np.asarray(embedding, dtype=np.float32)
+            if row.shape != (self.dimension,):
+                raise ValueError(f"Dimensi embedding {row.shape}, index {self.dimension}")
+            seen.add(key)
+            self._keys.append(key)
+            self._groups.append(group)
+            rows.append(row)
+        if not rows:
+            return 0
+        matrix = _normalize(np.vstack(rows))
+
+        needed = self._num_extra + len(rows)
+        if needed > len(self._extra):
+            grown = np.zeros((max(needed, 2 * len(self._extra)), self.dimension), np.float32)
+            grown[: self._num_extra] = self._extra[: self._num_extra]
+            self._extra = grown
+        self._extra[self._num_extra : needed] = matrix
+        self._num_extra = needed
+        self._alive = np.concatenate((self._alive, np.ones(len(rows), dtype=bool)))
+        self._count += len(rows)
+        return len(rows)
+
+    def remove(self, keys: Iterable[str]) -> int:
+        with self._lock:
+            self.fingerprint = None
+            return self._remove_slots(self._keys.find(keys))
+
+    def remove_groups(self, groups: Iterable[str]) -> int:
+        with self._lock:
+            self.fingerprint = None
+            return self._remove_slots(self.group_slots(groups))
+
+    def group_slots(self, groups: Iterable[str]) -> np.ndarray:
+        """Slot aktif (terurut) milik group-group `groups`."""
+        with self._lock:
+            slots = self._groups.slots(groups)
+            return slots[self._alive[slots]]
+
+    def key_slots(self, keys: Iterable[str]) -> np.ndarray:
+        with self._lock:
+            slots = self._keys.find(keys)
+            return slots[self._alive[slots]].astype(np.int32)
+
+    def _remove_slots(self, slots: np.ndarray) -> int:
+        if len(slots) == 0:
+            return 0
+        self._alive[slots] = False
+        self._keys.clear(slots.tolist())
+        self._count -= len(slots)
+        self._on_removed(slots)
+        return len(slots)
+
+    def _on_added(self, slots: np.ndarray) -> None:
+        pass
+
+    def _on_removed(self, slots: np.ndarray) -> None:
+        pass
+
+    def _rows(self, slots: np.ndarray) -> np.ndarray:
+        base = len(self._base)
+        rows = np.empty((len(slots), self.dimension), dtype=np.float32)
+        in_base = slots < base
+        rows[in_base] = self._base[slots[in_base]]
+        rows[~in_base] = self._extra[slots[~in_base] - base]
+        return rows
+
+    def search(
+        self, query: Sequence[float], top_k: int, slots: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k (slots, cosine similarity) terurut similarity desc.
+
+        `slots` membatasi pencarian ke slot tersebut (mis. hasil `group_slots`).
+        """
+        q = _normalize(np.asarray(query, dtype=np.float32))
+        with self._lock:
+            if slots is not None:
+                return self._search_slots(q, top_k, slots)
+            if self._count == 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            scores = np.concatenate(
+                (self._base @ q, self._extra[: self._num_extra] @ q)
+            )
+            scores[~self._alive] = -np.inf
+            k = min(top_k, self._count)
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.lexsort((top, -scores[top]))]
+        top = top[np.isfinite(scores[top])]
+        return top, scores[top]
+
+    def _search_slots(
+        self, q: np.ndarray, top_k: int, slots: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Exact search hanya pada baris `slots` (slot mati dilewati)."""
+        slots = np.asarray(slots, dtype=np.int64)
+        slots = slots[self._alive[slots]]
+        if len(slots) == 0 or top_k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = self._rows(slots) @ q
+        k = min(top_k, len(slots))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.lexsort((slots[top], -scores[top]))]
+        return slots[top], scores[top]
+
+    def compact(self) -> None:
+        """Gabungkan baris tambahan ke matrix utama."""
+        with self._lock:
+            if self._num_extra:
+                self._base = np.concatenate((self._base, self._extra[: self._num_extra]))
+                self._extra = np.zeros((0, self.dimension), dtype=np.float32)
+                self._num_extra = 0
+            self._keys.freeze()
+            self._groups.freeze()
+
+    def save(self, path: str | Path) -> None:
+        """Tulis snapshot; file ditulis di luar lock agar query tidak terblokir."""
+        with self._lock:
+            meta, sections = self._snapshot_data()
+        write_snapshot(path, _SNAPSHOT_MAGIC, SNAPSHOT_VERSION, meta, sections)
+
+    def _snapshot_data(self) -> tuple[dict, dict[str, np.ndarray]]:
+        """Metadata dan array snapshot (dipanggil dengan lock dipegang).
+
+        Matrix hasil compact tidak diubah in place; `alive` di-copy.
+        """
+        self.compact()
+        sections = {
+            "matrix": self._base,
+            "alive": self._alive.copy(),
+            "keys": self._keys.base,
+            "keys_order": self._keys.order,
+            **self._groups.arrays(),
+        }
+        meta = {
+            "dimension": self.dimension,
+            "count": self._count,
+            "fingerprint": self.fingerprint,
+        }
+        return meta, sections
+
+    def _load_arrays(self, path: str | Path) -> dict:
+        meta, arrays, mm = read_snapshot(path, _SNAPSHOT_MAGIC, SNAPSHOT_VERSION)
+        if meta["dimension"] != self.dimension:
+            mm.close()
+            raise ValueError(f"Dimensi snapshot {meta['dimension']}, index {self.dimension}")
+        self._base = arrays["matrix"]
+        # alive di-update in place oleh remove: copy (1 byte per slot)
+        self._alive = arrays["alive"].copy()
+        self._keys = SlotValues(arrays["keys"], arrays.get("keys_order"))
+        self._groups = SlotGroups.from_arrays(arrays)
+        self._count = meta["count"]
+        self.fingerprint = meta.get("fingerprint")
+        self._mmap = mm
+        return meta
+
+    @classmethod
+    def load(cls, path: str | Path, dimension: int, **kwargs) -> "VectorIndex":
+        """Buka snapshot dengan mmap; matrix embedding tidak di-copy ke heap."""
+        index = cls(dimension, **kwargs)
+        index._load_arrays(path)
+        return index
+
+
+class HNSWVectorIndex(VectorIndex):
+    """Approximate search dengan graph HNSW (hnswlib) di atas matrix yang sama.
+
+    Graph disimpan di file `<snapshot>.<generation>.hnsw`; generation yang
+    sama dicatat di metadata snapshot matrix, sehingga matrix tidak pernah
+    dipasangkan dengan graph dari save lain (save gagal sebagian atau dua
+    worker menulis bersamaan). Jika graph untuk generation itu tidak ada,
+    graph dibangun ulang dari matrix snapshot.
+    """
+
+    def __init__(
+        self, dimension: int, m: int = 16, ef_construction: int = 200, ef_search: int = 64
+    ) -> None:
+        if hnswlib is None:
+            raise ImportError("Backend HNSW membutuhkan paket hnswlib (pip install -r requirements-hnsw.txt)")
+        self._m = m
+        self._ef_construction = ef_construction
+        self._ef_search = ef_search
+        self._graph = None
+        super().__init__(dimension)
+
+    def build(self, entries: Iterable[VectorEntry]) -> int:
+        with self._lock:
+            count = super().build(entries)
+            self._build_graph()
+            return count
+
+    def _build_graph(self) -> None:
+        slots = np.flatnonzero(self._alive)
+        self._graph = hnswlib.Index(space="ip", dim=self.dimension)
+        self._graph.init_index(
+            max_elements=max(len(self._alive), 1),
+            M=self._m,
+            ef_construction=self._ef_construction,
+        )
+        if len(slots):
+            self._graph.add_items(self._rows(slots), slots)
+        self._graph.set_ef(self._ef_search)
+
+    def _on_added(self, slots: np.ndarray) -> None:
+        if len(slots) == 0:
+            return
+        capacity = self._graph.get_max_elements()
+        if len(self._alive) > capacity:
+            self._graph.resize_index(max(len(self._alive), 2 * capacity))
+        self._graph.add_items(self._rows(slots), slots)
+
+    def _on_removed(self, slots: np.ndarray) -> None:
+        for slot in slots.tolist():
+            self._graph.mark_deleted(slot)
+
+    def search(
+        self, query: Sequence[float], top_k: int, slots: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Subset selektif dicari exact; subset besar lewat graph lalu di-filter."""
+        q = _normalize(np.asarray(query, dtype=np.float32))
+        with self._lock:
+            if slots is not None and len(slots) * _EXACT_FILTER_RATIO < self._count:
+                return self._search_slots(q, top_k, slots)
+            k = min(top_k, self._count)
+            if slots is not None:
+                k = min(k * _FILTER_OVERSAMPLE, self._count)
+            if k == 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            self._graph.set_ef(max(self._ef_search, k))
+            try:
+                labels, distances = self._graph.knn_query(q, k=k)
+            except RuntimeError:
+                # hnswlib gagal jika graph tidak menemukan k elemen hidup (mis. banyak
+                # elemen mark_deleted); fallback ke exact search
+                if slots is None:
+                    return super().search(query, top_k)
+                return self._search_slots(q, top_k, slots)
+            labels = labels[0].astype(np.int64)
+            # space "ip": distance = 1 - inner product (= cosine, vektor ter-normalisasi)
+            scores = 1 - distances[0]
+            if slots is None:
+                return labels, scores
+            keep = np.isin(labels, slots)
+            if keep.sum() < min(top_k, len(slots)):
+                return self._search_slots(q, top_k, slots)
+            return labels[keep][:top_k], scores[keep][:top_k]
+
+    def save(self, path: str | Path) -> None:
+        """Matrix dulu, lalu graph di-rename dari file sementara unik.
+
+        Sampai rename selesai, load melihat generation tanpa graph dan membangun
+        graph dari matrix; graph dari writer lain tidak pernah dipasangkan.
+        """
+        generation = uuid.uuid4().hex
+        graph_path = _graph_path(path, generation)
+        tmp_path = temp_path(graph_path)
+        try:
+            with self._lock:
+                meta, sections = self._snapshot_data()
+                # hnswlib tidak aman untuk save bersamaan dengan add/mark_deleted
+                self._graph.save_index(str(tmp_path))
+            fsync_file(tmp_path)
+            meta["graph_generation"] = generation
+            write_snapshot(path, _SNAPSHOT_MAGIC, SNAPSHOT_VERSION, meta, sections)
+            tmp_path.replace(graph_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        _remove_stale_graphs(path)
+
+    @classmethod
+    def load(cls, path: str | Path, dimension: int, **kwargs) -> "HNSWVectorIndex":
+        index = cls(dimension, **kwargs)
+        meta = index._load_arrays(path)
+        generation = meta.get("graph_generation")
+        graph_path = _graph_path(path, generation) if generation else None
+        if graph_path is None or not graph_path.exists():
+            index._build_graph()
+            return index
+        index._graph = hnswlib.Index(space="ip", dim=dimension)
+        index._graph.load_index(str(graph_path), max_elements=max(len(index._alive), 1))
+        index._graph.set_ef(index._ef_search)
+        return index
+
+
+def _graph_path(path: str | Path, generation: str) -> Path:
+    return Path(f"{path}.{generation}.hnsw")
+
+
+def _remove_stale_graphs(path: str | Path) -> None:
+    """Hapus graph selain milik snapshot matrix yang sedang terpasang (best effort)."""
+    try:
+        meta, arrays, mm = read_snapshot(path, _SNAPSHOT_MAGIC, SNAPSHOT_VERSION)
+    except (OSError, ValueError):
+        return
+    del arrays
+    mm.close()
+    live_path = _graph_path(path, meta.get("graph_generation") or "")
+    for graph_path in Path(path).parent.glob(f"{Path(path).name}.*.hnsw"):
+        if graph_path != live_path:
+            graph_path.unlink(missing_ok=True)
@@ -1,8 +1,42 @@
-"""Vector Retriever Implementation."""
+"""Vector Retriever Implementation.
 
+Default-nya similarity search dijalankan di Postgres (pgvector). Jika
+`index` diberikan, search dilakukan di `VectorIndex` in-process dan hanya
+chunk hasil top-k yang diambil dari repository.
+
+Hydrate lewat `get_by_ids` disengaja: index lokal hanya menyimpan embedding,
+bukan konten dan metadata chunk, agar memori per worker tetap sebanding
+dengan matrix saja dan konten selalu konsisten dengan database. Search-nya
+tetap in-process; round trip yang tersisa adalah satu lookup primary key
+untuk top-k (semua query sekaligus di `retrieve_many`).
+
+`retrieve_many` meng-embed semua query dalam satu request dan mencari
+semuanya dalam satu statement SQL (atau satu kali hydrate untuk index lokal).
+"""
+
+import asyncio
+from collections.abc import Iterable, Iterator
+from uuid import UUID
+
+import numpy as np
+
+from app.domain.entities.chunk import Chunk
 from app.domain.interfaces.chunk_repository import IChunkRepository
 from app.domain.interfaces.embedding_service import IEmbeddingService
-from app.domain.interfaces.retriever_service import IRetrieverService, RetrievalResult
+from app.domain.interfaces.retriever_service import (
+    IRetrieverService,
+    RetrievalFilter,
+    RetrievalResult,
+)
+from app.infrastructure.retriever.filtering import allowed_slots
+from app.infrastructure.retriever.vector_index import VectorEntry, VectorIndex
+
+
+def vector_entries(chunks: Iterable[Chunk]) -> Iterator[VectorEntry]:
+    """Entry (chunk id, document id, embedding) untuk `VectorIndex`."""
+    for chunk in chunks:
+        if chunk.embedding is not None:
+            yield str(chunk.id), str(chunk.document_id), chunk.embedding
 
 
 class VectorRetriever(IRetrieverService):
@@ -10,21 +44,84 @@ class VectorRetriever(IRetrieverService):
         self,
         chunk_repository: IChunkRepository,
         embedding_service: IEmbeddingService,
+        index: VectorIndex | None = None,
     ) -> None:
         self._chunk_repo = chunk_repository
         self._embedding_service = embedding_service
+        self._index = index
+
+    async def retrieve(
+        self, query: str, top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[RetrievalResult]:
+        query_embedding = await self._embedding_service.embed_query(query)
 
-    async def retrieve(self, query: str, top_k: int = 5) -> list[RetrievalResult]:
-        if hasattr(self._embedding_service, "embed_query"):
-            query_embedding = await self._embedding_service.embed_query(query)
-        else:
-            query_embedding = await self._embedding_service.embed_text(query)
+        if self._index is not None:
+            return (await self._retrieve_local([query_embedding], top_k, filters))[0]
 
         results = await self._chunk_repo.search_by_embedding(
-            embedding=query_embedding, top_k=top_k
+            embedding=query_embedding, top_k=top_k, filters=filters
         )
 
         return [
             RetrievalResult(chunk=chunk, score=score, source="vector")
             for chunk, score in results
         ]
+
+    async def retrieve_many(
+        self, queries: list[str], top_k: int = 5, filters: RetrievalFilter | None = None
+    ) -> list[list[RetrievalResult]]:
+        """Satu request embedding dan satu round trip database untuk semua query."""
+        if not queries:
+            return []
+        query_embeddings = await self._embedding_service.embed_queries(queries)
+
+        if self._index is not None:
+            return await self._retrieve_local(query_embeddings, top_k, filters)
+
+        ranked = await self._chunk_repo.search_by_embeddings(
+            embeddings=query_embeddings, top_k=top_k, filters=filters
+        )
+        return [
+            [RetrievalResult(chunk=chunk, score=score, source="vector") for chunk, score in results]
+            for results in ranked
+        ]
+
+    async def _retrieve_local(
+        self,
+        query_embeddings: list[list[float]],
+        top_k: int,
+        filters: RetrievalFilter | None,
+    ) -> list[list[RetrievalResult]]:
+        empty: list[list[RetrievalResult]] = [[] for _ in query_embeddings]
+        if len(self._index) == 0:
+            return empty
+        slots = await allowed_slots(self._index, self._chunk_repo, filters)
+        if slots is not None and len(slots) == 0:
+            return empty
+        all_hits = await asyncio.to_thread(
+            lambda: [self._search(e, top_k, slots) for e in query_embeddings]
+        )
+        chunk_ids = list({chunk_id for hits in all_hits for chunk_id, _ in hits})
+        if not chunk_ids:
+            return empty
+
+        chunks = {c.id: c for c in await self._chunk_repo.get_by_ids(chunk_ids)}
+        return [
+            [
+                RetrievalResult(chunk=chunks[chunk_id], score=score, source="vector")
+                for chunk_id, score in hits
+                if chunk_id in chunks
+            ]
+            for hits in all_hits
+        ]
+
+    def _search(
+        self, query_embedding: list[float], top_k: int, allowed: np.ndarray | None = None
+    ) -> list[tuple[UUID, float]]:
+        slots, scores = self._index.search(query_embedding, top_k, slots=allowed)
+        hits = []
+        for slot, score in zip(slots.tolist(), scores.tolist()):
+            key = self._index.key(slot)
+            if key is not None:
+                hits.append((UUID(key), score))
+        return hits
@@ -10,6 +10,11 @@ from fastapi.staticfiles import StaticFiles
 from app import __version__
 from app.config import get_settings
 from app.infrastructure.database.connection import close_db, init_db
+from app.presentation.api.dependencies import (
+    close_services,
+    init_rag_pipeline,
+    start_index_sync,
+)
 from app.presentation.api.routes import chat_routes, document_routes, health_routes
 from app.presentation.web.routes import router as web_router
 
@@ -28,11 +33,22 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
         print(f"⚠️ Database initialization failed: {e}")
         print("   Make sure PostgreSQL is running and pgvector is installed")
 
+    if await start_index_sync() is not None:
+        print("✅ Retrieval index sync started")
+
+    try:
+        await init_rag_pipeline()
+        print("✅ Retrieval index built")
+    except Exception as e:
+        print(f"⚠️ Retrieval index build failed: {e}")
+        print("   Index akan dibangun pada chat request pertama")
+
     yield
 
     print("🛑 Shutting down...")
     await close_db()
     print("✅ Database connections closed")
+    await close_services()
 
 
 def create_app() -> FastAPI:
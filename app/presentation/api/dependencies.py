@@ -1,6 +1,8 @@
 """FastAPI Dependencies."""
 
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from functools import partial
 from typing import Annotated
 
 from fastapi import Cookie, Depends
@@ -15,12 +17,23 @@ from app.domain.interfaces.chunk_repository import IChunkRepository
 from app.domain.interfaces.document_repository import IDocumentRepository
 from app.domain.interfaces.embedding_service import IEmbeddingService
 from app.domain.interfaces.llm_service import ILLMService
+from app.domain.interfaces.retrieval_index import IRetrievalIndex
 from app.infrastructure.cache.redis_cache import RedisCacheService
-from app.infrastructure.database.connection import get_db_session
+from app.infrastructure.cohere_client import close_cohere_client
+from app.infrastructure.database.connection import get_db_session, get_read_db_session
 from app.infrastructure.database.repositories.chunk_repo import PostgresChunkRepository
 from app.infrastructure.database.repositories.document_repo import PostgresDocumentRepository
+from app.infrastructure.database.vector_index import EMBEDDING_DIMENSION
+from app.infrastructure.embedding.cached_embedding import CachedEmbeddingService
+from app.infrastructure.embedding.coalescing_embedding import CoalescingEmbeddingService
 from app.infrastructure.embedding.cohere_embedding import CohereEmbeddingService
+from app.infrastructure.embedding.local_embedding import LocalEmbeddingService
 from app.infrastructure.llm.cohere_llm import CohereLLMService
+from app.infrastructure.llm.local_llm import LocalLLMService
+from app.infrastructure.local_provider import LatencyProfile
+from app.infrastructure.retriever.index_sync import BroadcastRetrievalIndex, RedisIndexSync
+from app.infrastructure.retriever.post_commit_index import PostCommitRetrievalIndex
+from app.infrastructure.retriever.tokenizer import term_frequencies
 
 
 def get_app_settings() -> Settings:
@@ -38,16 +51,63 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session read-only; ke read replica jika dikonfigurasi."""
+    async with get_read_db_session() as session:
+        yield session
+
+
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+
+
 async def get_document_repository(session: SessionDep) -> IDocumentRepository:
     return PostgresDocumentRepository(session)
 
 
+def _chunk_repository(session: AsyncSession) -> PostgresChunkRepository:
+    settings = get_settings()
+    return PostgresChunkRepository(
+        session,
+        hnsw_ef_search=settings.pgvector_hnsw_ef_search,
+        ivfflat_probes=settings.pgvector_ivfflat_probes,
+        iterative_scan=settings.pgvector_iterative_scan or None,
+        quantization=settings.pgvector_quantization,
+        rerank_oversample=settings.pgvector_rerank_oversample,
+        copy_threshold=settings.chunk_copy_threshold or None,
+    )
+
+
 async def get_chunk_repository(session: SessionDep) -> IChunkRepository:
-    return PostgresChunkRepository(session)
+    return _chunk_repository(session)
+
+
+async def get_read_document_repository(session: ReadSessionDep) -> IDocumentRepository:
+    return PostgresDocumentRepository(session)
+
+
+async def get_read_chunk_repository(session: ReadSessionDep) -> IChunkRepository:
+    return _chunk_repository(session)
+
+
+@asynccontextmanager
+async def open_chunk_repository() -> AsyncIterator[IChunkRepository]:
+    """Repository dengan session primary sendiri, di luar dependency request."""
+    async with get_db_session() as session:
+        yield _chunk_repository(session)
+
+
+@asynccontextmanager
+async def open_read_chunk_repository() -> AsyncIterator[IChunkRepository]:
+    """Repository dengan session read sendiri, di luar dependency request."""
+    async with get_read_db_session() as session:
+        yield _chunk_repository(session)
 
 
 DocumentRepoDep = Annotated[IDocumentRepository, Depends(get_document_repository)]
 ChunkRepoDep = Annotated[IChunkRepository, Depends(get_chunk_repository)]
+# Repository untuk request read-only (retrieval, listing); build index dari primary
+ReadDocumentRepoDep = Annotated[IDocumentRepository, Depends(get_read_document_repository)]
+ReadChunkRepoDep = Annotated[IChunkRepository, Depends(get_read_chunk_repository)]
 
 _cache_service: RedisCacheService | None = None
 
@@ -59,23 +119,58 @@ async def get_cache_service() -> ICacheService:
     return _cache_service
 
 
-_embedding_service: CohereEmbeddingService | None = None
+_embedding_service: IEmbeddingService | None = None
 
 
 async def get_embedding_service() -> IEmbeddingService:
     global _embedding_service
     if _embedding_service is None:
-        _embedding_service = CohereEmbeddingService()
+        settings = get_settings()
+        if settings.ai_provider == "local":
+            _embedding_service = LocalEmbeddingService(
+                dimension=EMBEDDING_DIMENSION,
+                profile=LatencyProfile.from_settings(settings),
+            )
+        else:
+            _embedding_service = CohereEmbeddingService()
+        # Urutan: cache -> coalescing -> provider; cache hit tidak menunggu window
+        if settings.embedding_coalesce_window_ms > 0:
+            _embedding_service = CoalescingEmbeddingService(
+                _embedding_service,
+                window=settings.embedding_coalesce_window_ms / 1000,
+                max_batch=settings.embedding_coalesce_max_batch,
+            )
+        if settings.query_embedding_cache_size > 0 or settings.query_embedding_cache_ttl > 0:
+            _embedding_service = CachedEmbeddingService(
+                _embedding_service,
+                cache_service=await get_cache_service(),
+                # Key per provider: embedding local tidak boleh tercampur dengan Cohere
+                model=(
+                    f"local:{EMBEDDING_DIMENSION}"
+                    if settings.ai_provider == "local"
+                    else settings.embedding_model
+                ),
+                max_entries=settings.query_embedding_cache_size,
+                ttl=settings.query_embedding_cache_ttl,
+            )
     return _embedding_service
 
 
-_llm_service: CohereLLMService | None = None
+_llm_service: ILLMService | None = None
 
 
 async def get_llm_service() -> ILLMService:
     global _llm_service
     if _llm_service is None:
-        _llm_service = CohereLLMService()
+        settings = get_settings()
+        if settings.ai_provider == "local":
+            _llm_service = LocalLLMService(
+                profile=LatencyProfile.from_settings(settings),
+                response=settings.local_provider_response,
+                token_delay=settings.local_provider_token_delay_ms / 1000,
+            )
+        else:
+            _llm_service = CohereLLMService()
     return _llm_service
 
 
@@ -83,36 +178,134 @@ CacheServiceDep = Annotated[ICacheService, Depends(get_cache_service)]
 EmbeddingServiceDep = Annotated[IEmbeddingService, Depends(get_embedding_service)]
 LLMServiceDep = Annotated[ILLMService, Depends(get_llm_service)]
 
+_rag_pipeline: RAGPipeline | None = None
+
+
+async def get_rag_pipeline() -> RAGPipeline:
+    global _rag_pipeline
+    if _rag_pipeline is None:
+        settings = get_settings()
+        _rag_pipeline = RAGPipeline(
+            embedding_service=await get_embedding_service(),
+            llm_service=await get_llm_service(),
+            cache_service=await get_cache_service(),
+            rrf_k=settings.rrf_k,
+            fusion_method=settings.fusion_method,
+            bm25_weight=settings.bm25_weight,
+            vector_weight=settings.vector_weight,
+            bm25_early_termination=settings.bm25_early_termination,
+            bm25_snapshot_path=settings.bm25_snapshot_path or None,
+            vector_backend=settings.vector_backend,
+            vector_snapshot_path=settings.vector_snapshot_path or None,
+            hnsw_m=settings.hnsw_m,
+            hnsw_ef_construction=settings.hnsw_ef_construction,
+            hnsw_ef_search=settings.hnsw_ef_search,
+            bm25_timeout=settings.bm25_timeout,
+            vector_timeout=settings.vector_timeout,
+        )
+    return _rag_pipeline
+
+
+_index_sync: RedisIndexSync | None = None
+
+
+async def _reload_rag_pipeline() -> None:
+    pipeline = await get_rag_pipeline()
+    async with open_chunk_repository() as chunk_repo:
+        await pipeline.reload(chunk_repo)
+
+
+async def start_index_sync() -> RedisIndexSync | None:
+    """Mulai listener update index dari worker lain, dipanggil dari lifespan.
+
+    Dimulai sebelum index dibangun: event selama build masuk journal pipeline.
+    """
+    global _index_sync
+    settings = get_settings()
+    if _index_sync is None and settings.retrieval_index_sync:
+        _index_sync = RedisIndexSync(
+            index=await get_rag_pipeline(),
+            open_repository=open_chunk_repository,
+            reload=_reload_rag_pipeline,
+            redis_url=settings.redis_url,
+        )
+        _index_sync.start()
+    return _index_sync
+
+
+async def get_index_sync() -> RedisIndexSync | None:
+    return _index_sync
+
+
+IndexSyncDep = Annotated[RedisIndexSync | None, Depends(get_index_sync)]
+
+
+async def init_rag_pipeline() -> RAGPipeline:
+    """Build index retrieval process-wide, dipanggil dari lifespan."""
+    pipeline = await get_rag_pipeline()
+    # Dari primary: replica yang tertinggal akan membangun index dari corpus lama
+    async with open_chunk_repository() as chunk_repo:
+        await pipeline.initialize(chunk_repo)
+    return pipeline
+
+
+RAGPipelineDep = Annotated[RAGPipeline, Depends(get_rag_pipeline)]
+
+
+async def close_services() -> None:
+    """Tutup client Cohere beserta service yang memakainya, dipanggil dari lifespan."""
+    global _embedding_service, _llm_service, _rag_pipeline, _index_sync
+    if _index_sync is not None:
+        await _index_sync.close()
+        _index_sync = None
+    # Service (dan pipeline) yang di-cache masih memegang client yang ditutup
+    _embedding_service = None
+    _llm_service = None
+    _rag_pipeline = None
+    await close_cohere_client()
+
+
+async def get_retrieval_index(
+    session: SessionDep, pipeline: RAGPipelineDep, index_sync: IndexSyncDep
+) -> IRetrievalIndex:
+    """Index retrieval yang di-update setelah transaksi request berhasil di-commit.
+
+    Dengan index sync, update yang sama di-broadcast ke worker lain.
+    """
+    index: IRetrievalIndex = pipeline
+    if index_sync is not None:
+        index = BroadcastRetrievalIndex(pipeline, index_sync)
+    return PostCommitRetrievalIndex(index, session)
+
+
+RetrievalIndexDep = Annotated[IRetrievalIndex, Depends(get_retrieval_index)]
+
 
 async def get_ingest_use_case(
     doc_repo: DocumentRepoDep,
     chunk_repo: ChunkRepoDep,
     embedding_service: EmbeddingServiceDep,
+    retrieval_index: RetrievalIndexDep,
 ) -> IngestDocumentUseCase:
     return IngestDocumentUseCase(
         document_repo=doc_repo,
         chunk_repo=chunk_repo,
         embedding_service=embedding_service,
+        retrieval_index=retrieval_index,
+        term_frequencies=term_frequencies,
     )
 
 
 async def get_chat_use_case(
-    chunk_repo: ChunkRepoDep,
-    embedding_service: EmbeddingServiceDep,
     llm_service: LLMServiceDep,
     cache_service: CacheServiceDep,
-    settings: SettingsDep,
+    pipeline: RAGPipelineDep,
 ) -> ChatWithRAGUseCase:
-    pipeline = RAGPipeline(
-        chunk_repository=chunk_repo,
-        embedding_service=embedding_service,
-        llm_service=llm_service,
-        cache_service=cache_service,
-        rrf_k=settings.rrf_k,
-    )
-    await pipeline.initialize()
+    # Session (read) dibuka per retrieval, bukan untuk seluruh request
     return ChatWithRAGUseCase(
-        retriever=pipeline._hybrid,
+        retriever_factory=partial(
+            pipeline.open_retriever, open_read_chunk_repository, open_chunk_repository
+        ),
         llm_service=llm_service,
         cache_service=cache_service,
     )
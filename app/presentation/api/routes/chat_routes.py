@@ -19,7 +19,7 @@ async def chat(
     try:
         sid = request.session_id or session_id
         result, new_session_id, sources, cached = await chat_use_case.execute(
-            message=request.message, session_id=sid
+            message=request.message, session_id=sid, filters=request.to_filter()
         )
         response.set_cookie(key="session_id", value=new_session_id, httponly=True, max_age=86400)
         return APIResponse(
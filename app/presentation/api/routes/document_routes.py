@@ -1,17 +1,29 @@
 """Document Routes."""
 
+import base64
+import binascii
 import json
+from datetime import datetime
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile, status
 
 from app.application.dto.document_dto import (
     DocumentListResponse,
     DocumentResponse,
     DocumentUploadRequest,
 )
-from app.presentation.api.dependencies import DocumentRepoDep, IngestUseCaseDep
+from app.domain.interfaces.document_repository import DocumentCursor
+from app.presentation.api.dependencies import (
+    ChunkRepoDep,
+    DocumentRepoDep,
+    IndexSyncDep,
+    IngestUseCaseDep,
+    RAGPipelineDep,
+    ReadDocumentRepoDep,
+    RetrievalIndexDep,
+)
 from app.presentation.api.schemas import APIResponse
 
 router = APIRouter(prefix="/api/documents", tags=["Documents"])
@@ -89,33 +101,76 @@ async def upload_file(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+def _encode_cursor(cursor: DocumentCursor) -> str:
+    created_at, document_id = cursor
+    raw = f"{created_at.isoformat()}|{document_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> DocumentCursor:
+    try:
+        created_at, document_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(document_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
 @router.get("", response_model=APIResponse[DocumentListResponse])
 async def list_documents(
-    doc_repo: DocumentRepoDep, limit: int = 20, offset: int = 0
+    doc_repo: ReadDocumentRepoDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
 ) -> APIResponse[DocumentListResponse]:
-    documents = await doc_repo.get_all(limit=limit, offset=offset)
+    after = _decode_cursor(cursor) if cursor else None
+    page = await doc_repo.list_page(limit=limit, after=after)
     doc_responses = [
         DocumentResponse(
-            id=str(doc.id),
-            filename=doc.filename,
-            chunk_count=0,
-            metadata=doc.metadata,
-            created_at=doc.created_at,
+            id=str(item.document.id),
+            filename=item.document.filename,
+            chunk_count=item.chunk_count,
+            metadata=item.document.metadata,
+            created_at=item.document.created_at,
         )
-        for doc in documents
+        for item in page.items
     ]
     return APIResponse(
         success=True,
-        data=DocumentListResponse(documents=doc_responses, total=len(doc_responses)),
+        data=DocumentListResponse(
+            documents=doc_responses,
+            total=page.total,
+            next_cursor=_encode_cursor(page.next_cursor) if page.next_cursor else None,
+        ),
     )
 
 
+@router.post("/reindex")
+async def reindex_documents(
+    chunk_repo: ChunkRepoDep, pipeline: RAGPipelineDep, index_sync: IndexSyncDep
+) -> APIResponse:
+    """Rebuild index retrieval bersama dari database (worker lain ikut reload)."""
+    try:
+        chunk_count = await pipeline.refresh(chunk_repo)
+        if index_sync is not None:
+            await index_sync.publish("refresh")
+        return APIResponse(
+            success=True,
+            data={"chunk_count": chunk_count},
+            message=f"Index berhasil dibangun ulang dengan {chunk_count} chunks",
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
 @router.delete("/{document_id}")
-async def delete_document(document_id: str, doc_repo: DocumentRepoDep) -> APIResponse:
+async def delete_document(
+    document_id: str, doc_repo: DocumentRepoDep, retrieval_index: RetrievalIndexDep
+) -> APIResponse:
     try:
-        deleted = await doc_repo.delete(UUID(document_id))
+        doc_uuid = UUID(document_id)
+        deleted = await doc_repo.delete(doc_uuid)
         if not deleted:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+        await retrieval_index.remove_document(doc_uuid)
         return APIResponse(success=True, message="Dokumen berhasil dihapus")
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ID")
@@ -0,0 +1,140 @@
+"""Benchmark BM25 index: latency query pada corpus sintetis.
+
+Contoh:
+    python benchmark_bm25.py --sizes 100000 1000000
+    python benchmark_bm25.py --sizes 100000 --compare   # bandingkan dengan rank_bm25
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from collections import Counter
+
+import numpy as np
+
+from app.infrastructure.retriever.bm25_index import BM25Index
+
+
+class Corpus:
+    """Corpus sintetis dengan distribusi term Zipf, disimpan sebagai term id."""
+
+    def __init__(
+        self, num_docs: int, vocab_size: int, avg_len: int, rng: np.random.Generator
+    ) -> None:
+        lengths = rng.poisson(avg_len, size=num_docs)
+        self.term_ids = ((rng.zipf(1.1, size=int(lengths.sum())) - 1) % vocab_size).astype(
+            np.int32
+        )
+        self.bounds = np.r_[0, np.cumsum(lengths)]
+
+    def __len__(self) -> int:
+        return len(self.bounds) - 1
+
+    def doc(self, i: int) -> list[str]:
+        return [f"t{t}" for t in self.term_ids[self.bounds[i] : self.bounds[i + 1]].tolist()]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.doc(i)
+
+
+def make_queries(corpus: Corpus, num_queries: int, rng: np.random.Generator) -> list[list[str]]:
+    """Query 2-6 term yang diambil dari dokumen acak (term umum ikut terwakili)."""
+    queries = []
+    for doc_id in rng.integers(0, len(corpus), size=num_queries):
+        doc = corpus.doc(int(doc_id)) or ["t0"]
+        queries.append([doc[i] for i in rng.integers(0, len(doc), size=rng.integers(2, 7))])
+    return queries
+
+
+def top_k(
+    index: BM25Index, query: list[str], k: int, early_termination: bool = False
+) -> list[int]:
+    slots, _ = index.search(query, k, early_termination=early_termination)
+    return slots.tolist()
+
+
+def percentiles(samples: list[float]) -> str:
+    p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+    return f"p50={p50:.2f}ms p95={p95:.2f}ms p99={p99:.2f}ms"
+
+
+def run(size: int, args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    print(f"\n[{size:,} chunks]")
+
+    start = time.perf_counter()
+    corpus = Corpus(size, args.vocab, args.avg_len, rng)
+    queries = make_queries(corpus, args.queries, rng)
+    print(f"    Corpus generated in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    index = BM25Index()
+    index.build((str(i), str(i // 8), Counter(doc)) for i, doc in enumerate(corpus))
+    print(f"    Index built in {time.perf_counter() - start:.1f}s "
+          f"(vocab={index.vocabulary_size:,})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = Path(tmp) / "bm25.snapshot"
+        start = time.perf_counter()
+        index.save(snapshot)
+        print(f"    Snapshot saved in {time.perf_counter() - start:.1f}s "
+              f"({snapshot.stat().st_size / 2**20:.0f} MiB)")
+        start = time.perf_counter()
+        BM25Index.load(snapshot)
+        print(f"    Snapshot loaded in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    for early_termination in (False, True):
+        for query in queries[:10]:
+            top_k(index, query, args.top_k, early_termination)  # warm-up
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            top_k(index, query, args.top_k, early_termination)
+            latencies.append(time.perf_counter() - start)
+        label = "MaxScore" if early_termination else "exhaustive"
+        print(f"    BM25Index ({label}):  {percentiles(latencies)}")
+
+    if args.compare:
+        try:
+            from rank_bm25 import BM25Okapi
+        except ImportError:
+            print("    rank_bm25 tidak terinstall, skip perbandingan")
+            return
+
+        okapi = BM25Okapi(list(corpus))
+        latencies = []
+        mismatches = 0
+        for query in queries[: args.compare_queries]:
+            start = time.perf_counter()
+            scores = okapi.get_scores(query)
+            expected = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)
+            latencies.append(time.perf_counter() - start)
+            expected_ids = [i for i, s in expected[: args.top_k] if s > 0]
+            mismatches += expected_ids != top_k(index, query, args.top_k)[: len(expected_ids)]
+        print(f"    BM25Okapi:  {percentiles(latencies)}")
+        print(f"    Ranking mismatch: {mismatches}/{len(latencies)} queries")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--vocab", type=int, default=200_000)
+    parser.add_argument("--avg-len", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--compare-queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("BM25 Index Benchmark")
+    print("=" * 50)
+    for size in args.sizes:
+        run(size, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark insert chunks: ORM (add_all) vs binary COPY.
+
+Butuh database yang sudah di-init; semua insert di-rollback.
+
+Contoh:
+    python benchmark_ingest.py --chunks 10000
+"""
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+import numpy as np
+
+from app.domain.entities.chunk import Chunk
+from app.domain.entities.document import Document
+from app.infrastructure.database.connection import close_db, get_session_maker
+from app.infrastructure.database.repositories.chunk_repo import PostgresChunkRepository
+from app.infrastructure.database.repositories.document_repo import PostgresDocumentRepository
+from app.infrastructure.database.vector_index import EMBEDDING_DIMENSION
+
+
+def make_chunks(document_id, count: int, rng: np.random.Generator) -> list[Chunk]:
+    embeddings = rng.normal(size=(count, EMBEDDING_DIMENSION)).astype(np.float32)
+    return [
+        Chunk(
+            document_id=document_id,
+            content=f"chunk benchmark {i} " * 20,
+            chunk_index=i,
+            content_hash=uuid4().hex,
+            embedding=embeddings[i].tolist(),
+            term_frequencies={"chunk": 20, "benchmark": 20, str(i): 20},
+            metadata={"document_filename": "benchmark.json", "chunk_index": i},
+        )
+        for i in range(count)
+    ]
+
+
+async def insert(chunks_count: int, copy: bool, rng: np.random.Generator) -> float:
+    async with get_session_maker()() as session:
+        document = Document(filename="benchmark.json", content_hash=uuid4().hex)
+        await PostgresDocumentRepository(session).save(document)
+        chunks = make_chunks(document.id, chunks_count, rng)
+        repo = PostgresChunkRepository(session, copy_threshold=1 if copy else None)
+
+        start = time.perf_counter()
+        await repo.save_many(chunks)
+        elapsed = time.perf_counter() - start
+        await session.rollback()
+    return elapsed
+
+
+async def main(args: argparse.Namespace) -> None:
+    print("=" * 50)
+    print("Chunk Ingest Benchmark")
+    print("=" * 50)
+
+    rng = np.random.default_rng(args.seed)
+    try:
+        for label, copy in (("ORM add_all", False), ("binary COPY", True)):
+            elapsed = await insert(args.chunks, copy, rng)
+            print(f"    {label:<12} {args.chunks:,} chunks in {elapsed:.2f}s "
+                  f"({args.chunks / elapsed:,.0f} chunks/s)")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
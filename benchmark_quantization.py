@@ -0,0 +1,168 @@
+"""Benchmark quantization index vector: ukuran index vs recall@k.
+
+Mensimulasikan pencarian pgvector dengan PGVECTOR_QUANTIZATION: kandidat
+top_k * oversample diambil dengan jarak halfvec (cosine) atau bit (hamming
+atas binary_quantize), lalu di-rescore dengan cosine float32. Recall diukur
+terhadap exact search float32; kandidat dicari exact (tanpa graph ANN) agar
+yang terukur hanya kerugian karena quantization.
+
+Contoh:
+    python benchmark_quantization.py --size 100000
+    python benchmark_quantization.py --from-db --tolerance 0.01
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+MODES = ("none", "halfvec", "binary")
+
+
+def synthetic_embeddings(
+    size: int, dimension: int, clusters: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Embedding ter-cluster (mirip embedding teks), ter-normalisasi."""
+    centers = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size=size)]
+    vectors += rng.normal(scale=1.5, size=(size, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+async def load_embeddings(limit: int) -> np.ndarray:
+    from sqlalchemy import select
+
+    from app.infrastructure.database.connection import close_db, get_session_maker
+    from app.infrastructure.database.models import ChunkModel
+
+    try:
+        async with get_session_maker()() as session:
+            result = await session.execute(
+                select(ChunkModel.embedding)
+                .where(ChunkModel.embedding.is_not(None))
+                .limit(limit)
+            )
+            vectors = np.array([np.asarray(e, dtype=np.float32) for e in result.scalars()])
+    finally:
+        await close_db()
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def storage_bytes(mode: str, dimension: int) -> int:
+    """Ukuran satu nilai di pgvector (vector 4 byte/dim, halfvec 2, bit 1/8)."""
+    if mode == "halfvec":
+        return 2 * dimension + 8
+    if mode == "binary":
+        return (dimension + 7) // 8 + 8
+    return 4 * dimension + 8
+
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Candidates:
+    """Scoring kandidat dengan representasi quantized (semakin kecil semakin dekat)."""
+
+    def __init__(self, mode: str, vectors: np.ndarray) -> None:
+        self.mode = mode
+        if mode == "halfvec":
+            # Nilai float16 di-scoring di float32 (sama seperti halfvec_cosine_ops)
+            half = vectors.astype(np.float16).astype(np.float32)
+            self.data = half / np.linalg.norm(half, axis=1, keepdims=True)
+        elif mode == "binary":
+            self.data = np.packbits(vectors > 0, axis=1)
+        else:
+            self.data = vectors
+
+    def distances(self, query: np.ndarray) -> np.ndarray:
+        if self.mode == "binary":
+            bits = np.packbits(query > 0)
+            return _POPCOUNT[np.bitwise_xor(self.data, bits)].sum(axis=1, dtype=np.int32)
+        return -(self.data @ query)
+
+    def search(self, query: np.ndarray, limit: int) -> np.ndarray:
+        distances = self.distances(query)
+        top = np.argpartition(distances, limit - 1)[:limit]
+        return top[np.argsort(distances[top], kind="stable")]
+
+
+def rescore(vectors: np.ndarray, query: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    scores = vectors[candidates] @ query
+    return candidates[np.argsort(-scores, kind="stable")[:k]]
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, args: argparse.Namespace) -> None:
+    dimension = vectors.shape[1]
+    exact = [np.argsort(-(vectors @ q))[: args.top_k] for q in queries]
+    base_bytes = storage_bytes("none", dimension)
+
+    print(f"\n[{len(vectors):,} vectors x {dimension}, {len(queries)} queries, k={args.top_k}]")
+    for mode in MODES:
+        index = Candidates(mode, vectors)
+        size = storage_bytes(mode, dimension)
+        print(f"\n    {mode}: {size} bytes/vector "
+              f"({size * len(vectors) / 2**20:.0f} MiB, {base_bytes / size:.1f}x lebih kecil)")
+        recommended = None
+        for oversample in args.oversample if mode != "none" else [1]:
+            limit = min(args.top_k * oversample, len(vectors))
+            hits = 0
+            latencies = []
+            for query, expected in zip(queries, exact):
+                start = time.perf_counter()
+                found = rescore(vectors, query, index.search(query, limit), args.top_k)
+                latencies.append(time.perf_counter() - start)
+                hits += len(np.intersect1d(found, expected))
+            recall = hits / (len(queries) * args.top_k)
+            p50 = np.percentile(latencies, 50) * 1000
+            print(f"        oversample={oversample:<3} recall@{args.top_k}={recall:.4f} "
+                  f"scan p50={p50:.1f}ms")
+            if recommended is None and recall >= 1 - args.tolerance:
+                recommended = oversample
+        if mode != "none":
+            if recommended is None:
+                print(f"        ❌ recall tidak mencapai {1 - args.tolerance:.3f}, "
+                      "naikkan --oversample")
+            else:
+                print(f"        ✅ PGVECTOR_QUANTIZATION={mode} "
+                      f"PGVECTOR_RERANK_OVERSAMPLE={recommended}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--oversample", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="recall@k minimal = 1 - tolerance")
+    parser.add_argument("--from-db", action="store_true",
+                        help="pakai embedding dari tabel chunks (maks --size rows)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("Vector Quantization Benchmark")
+    print("=" * 50)
+
+    rng = np.random.default_rng(args.seed)
+    if args.from_db:
+        vectors = asyncio.run(load_embeddings(args.size))
+        if len(vectors) <= args.queries:
+            print("❌ Embedding di database tidak cukup untuk benchmark")
+            return
+        # Query = embedding yang di-hold out dari corpus
+        order = rng.permutation(len(vectors))
+        queries, vectors = vectors[order[: args.queries]], vectors[order[args.queries :]]
+    else:
+        vectors = synthetic_embeddings(
+            args.size + args.queries, args.dimension, args.clusters, rng
+        )
+        queries, vectors = vectors[: args.queries], vectors[args.queries :]
+
+    run(vectors, queries, args)
+
+
+if __name__ == "__main__":
+    main()
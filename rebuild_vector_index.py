@@ -0,0 +1,55 @@
+"""Rebuild index ANN pgvector setelah bulk load atau perubahan parameter.
+
+Contoh:
+    python rebuild_vector_index.py                 # tipe & parameter dari .env
+    python rebuild_vector_index.py --type ivfflat  # ganti tipe index
+    python rebuild_vector_index.py --quantization binary
+
+Setelah mengganti quantization, samakan PGVECTOR_QUANTIZATION di .env agar
+query memakai ekspresi yang sama dengan index.
+"""
+import argparse
+import asyncio
+import time
+
+from app.config import get_settings
+from app.infrastructure.database.connection import close_db, get_engine
+from app.infrastructure.database.vector_index import (
+    VECTOR_INDEX_NAME,
+    ivfflat_lists,
+    rebuild_vector_index,
+)
+
+
+async def main(index_type: str | None, quantization: str | None) -> None:
+    settings = get_settings()
+    index_type = index_type or settings.pgvector_index_type
+    quantization = quantization or settings.pgvector_quantization
+
+    print("=" * 50)
+    print(f"Rebuilding Vector Index '{VECTOR_INDEX_NAME}' ({index_type}, {quantization})")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    try:
+        row_count = await rebuild_vector_index(get_engine(), settings, index_type, quantization)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
+    finally:
+        await close_db()
+
+    if index_type == "hnsw":
+        print(f"    m={settings.pgvector_hnsw_m}, "
+              f"ef_construction={settings.pgvector_hnsw_ef_construction}")
+    elif index_type == "ivfflat":
+        print(f"    lists={ivfflat_lists(settings, row_count)}")
+    print(f"✅ {row_count} embeddings di-index dalam {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--type", choices=["hnsw", "ivfflat", "none"], default=None)
+    parser.add_argument("--quantization", choices=["none", "halfvec", "binary"], default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.type, args.quantization))
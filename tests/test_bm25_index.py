@@ -0,0 +1,131 @@
+"""Parity `BM25Index` dengan `rank_bm25.BM25Okapi` (implementasi sebelumnya).
+
+Skor top-k dibandingkan untuk mode exhaustive dan MaxScore setelah build,
+add, remove_groups, save/load, dan mutasi pada index hasil load.
+"""
+
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.infrastructure.retriever.bm25_index import BM25Index
+
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+TOP_K = 10
+
+
+def _corpus(num_docs: int, seed: int, prefix: str = "d") -> dict[str, list[str]]:
+    """Dokumen sintetis dengan distribusi term Zipf (term umum dan jarang)."""
+    rng = np.random.default_rng(seed)
+    docs = {}
+    for i in range(num_docs):
+        length = max(int(rng.poisson(12)), 1)
+        terms = (rng.zipf(1.3, size=length) - 1) % 300
+        docs[f"{prefix}{i}"] = [f"t{t}" for t in terms.tolist()]
+    return docs
+
+
+def _group(key: str) -> str:
+    # 5 chunk berurutan per dokumen: d0..d4 -> "d/0"
+    return f"{key[0]}/{int(key[1:]) // 5}"
+
+
+def _entries(docs: dict[str, list[str]]):
+    return [(key, _group(key), Counter(terms)) for key, terms in docs.items()]
+
+
+def _without(docs: dict[str, list[str]], groups=(), keys=()) -> dict[str, list[str]]:
+    return {k: v for k, v in docs.items() if _group(k) not in groups and k not in keys}
+
+
+def _queries(docs: dict[str, list[str]], seed: int) -> list[list[str]]:
+    rng = np.random.default_rng(seed)
+    keys = list(docs)
+    queries = [["t0", "t1"], ["t0", "t0", "t5"], ["tidak_ada", "t2"], ["t299"]]
+    for i in rng.integers(0, len(keys), size=30).tolist():
+        terms = docs[keys[i]]
+        queries.append([terms[j] for j in rng.integers(0, len(terms), size=rng.integers(1, 6))])
+    return queries
+
+
+def _expected(docs: dict[str, list[str]], query: list[str]) -> tuple[list[str], np.ndarray]:
+    """Top-k BM25Okapi; hanya dokumen yang memuat minimal satu term query."""
+    keys = list(docs)
+    scores = rank_bm25.BM25Okapi(list(docs.values())).get_scores(query)
+    query_terms = set(query)
+    candidates = [i for i, key in enumerate(keys) if query_terms & set(docs[key])]
+    ranked = sorted(candidates, key=lambda i: -scores[i])[:TOP_K]
+    return [keys[i] for i in ranked], np.array([scores[i] for i in ranked])
+
+
+def _assert_parity(index: BM25Index, docs: dict[str, list[str]], seed: int) -> None:
+    for query in _queries(docs, seed):
+        expected_keys, expected_scores = _expected(docs, query)
+        for early_termination in (False, True):
+            slots, scores = index.search(query, TOP_K, early_termination=early_termination)
+            np.testing.assert_allclose(scores, expected_scores, rtol=1e-9, atol=1e-12)
+            if len(expected_scores) == 0:
+                continue
+            # Urutan dalam tie bisa berbeda; key di atas skor ke-k harus sama
+            cutoff = expected_scores[-1] + 1e-9
+            keys = [index.key(s) for s in slots.tolist()]
+            assert {k for k, s in zip(keys, scores) if s > cutoff} == {
+                k for k, s in zip(expected_keys, expected_scores) if s > cutoff
+            }
+
+
+@pytest.fixture
+def docs() -> dict[str, list[str]]:
+    return _corpus(200, seed=1)
+
+
+def test_parity_after_build(docs):
+    index = BM25Index()
+    index.build(_entries(docs))
+
+    assert len(index) == len(docs)
+    _assert_parity(index, docs, seed=2)
+
+
+def test_parity_after_add_and_remove_groups(docs):
+    index = BM25Index()
+    index.build(_entries(docs))
+
+    added = _corpus(40, seed=3, prefix="n")
+    assert index.add(_entries(added)) == 40
+    docs = {**docs, **added}
+    _assert_parity(index, docs, seed=4)
+
+    groups = ["d/0", "d/7", "n/3"]
+    assert index.remove_groups(groups) == 15
+    docs = _without(docs, groups=groups)
+    assert len(index) == len(docs)
+    _assert_parity(index, docs, seed=5)
+
+
+def test_parity_after_save_load_and_mutation(docs, tmp_path):
+    index = BM25Index()
+    index.build(_entries(docs))
+    added = _corpus(10, seed=6, prefix="n")
+    index.add(_entries(added))
+    index.remove_groups(["n/0"])
+    docs = _without({**docs, **added}, groups=["n/0"])
+    index.save(tmp_path / "bm25.snapshot")
+
+    loaded = BM25Index.load(tmp_path / "bm25.snapshot")
+    assert len(loaded) == len(docs)
+    _assert_parity(loaded, docs, seed=7)
+
+    # Index hasil load (array mmap read-only) tetap bisa di-update
+    added = _corpus(25, seed=8, prefix="m")
+    loaded.add(_entries(added))
+    loaded.remove_groups(["d/1", "d/2"])
+    loaded.remove(["m0", "m7", "m12"])
+    docs = _without({**docs, **added}, groups=["d/1", "d/2"], keys=["m0", "m7", "m12"])
+    assert len(loaded) == len(docs)
+    _assert_parity(loaded, docs, seed=9)
+
+    loaded.compact()
+    _assert_parity(loaded, docs, seed=10)
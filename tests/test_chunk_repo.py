@@ -0,0 +1,68 @@
+"""Test `PostgresChunkRepository.stream_for_index` tanpa database.
+
+Row dibuat dengan result processor kolom embedding (pgvector), jadi tipe
+nilainya sama dengan yang dikembalikan driver.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.infrastructure.database.models import ChunkModel
+from app.infrastructure.database.repositories.chunk_repo import PostgresChunkRepository
+
+
+class _FakeStreamResult:
+    def __init__(self, partitions):
+        self._partitions = partitions
+
+    async def partitions(self):
+        for rows in self._partitions:
+            yield rows
+
+
+class _FakeSession:
+    def __init__(self, partitions):
+        self._partitions = partitions
+
+    async def stream(self, stmt):
+        return _FakeStreamResult(self._partitions)
+
+
+def _row(embedding: str | None):
+    process = ChunkModel.embedding.type.result_processor(asyncpg.dialect(), None)
+    return SimpleNamespace(
+        id=str(uuid4()),
+        document_id=str(uuid4()),
+        content="kucing makan ikan",
+        chunk_index=0,
+        content_hash=uuid4().hex,
+        term_frequencies={"kucing": 1},
+        embedding=process(embedding) if process else embedding,
+    )
+
+
+async def _collect(repository, **kwargs):
+    return [chunk async for batch in repository.stream_for_index(**kwargs) for chunk in batch]
+
+
+def test_stream_for_index_with_embedding():
+    rows = [_row("[0.5,-0.25,1]"), _row(None)]
+    repository = PostgresChunkRepository(_FakeSession([rows]))
+
+    chunks = asyncio.run(_collect(repository, with_embeddings=True))
+
+    assert [str(c.id) for c in chunks] == [r.id for r in rows]
+    assert chunks[0].embedding == [0.5, -0.25, 1.0]
+    assert chunks[1].embedding is None
+
+
+def test_stream_for_index_without_embedding():
+    repository = PostgresChunkRepository(_FakeSession([[_row("[1,2,3]")]]))
+
+    chunks = asyncio.run(_collect(repository))
+
+    assert chunks[0].embedding is None
+    assert chunks[0].term_frequencies == {"kucing": 1}
@@ -0,0 +1,69 @@
+"""Test batching, retry dan pembatalan di `CohereEmbeddingService` dengan client palsu."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from cohere.errors import TooManyRequestsError
+
+from app.config import get_settings
+from app.infrastructure.embedding.cohere_embedding import CohereEmbeddingService
+
+
+class FakeClient:
+    """Batch yang berisi "gagal" langsung error; batch lain menunggu `delay`."""
+
+    def __init__(self, delay: float = 0.0, throttled: int = 0) -> None:
+        self.calls: list[list[str]] = []
+        self.cancelled = 0
+        self._delay = delay
+        self._throttled = throttled
+
+    async def embed(self, texts, model, input_type, embedding_types):
+        self.calls.append(list(texts))
+        if "gagal" in texts:
+            raise ValueError("invalid input")
+        if self._throttled > 0:
+            self._throttled -= 1
+            raise TooManyRequestsError(body={"message": "throttled"})
+        try:
+            await asyncio.sleep(self._delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return SimpleNamespace(embeddings=SimpleNamespace(float_=[[float(len(t))] for t in texts]))
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setenv("COHERE_API_KEY", "test")
+    monkeypatch.setenv("EMBEDDING_BATCH_SIZE", "2")
+    monkeypatch.setenv("EMBEDDING_CONCURRENCY", "4")
+    monkeypatch.setenv("EMBEDDING_RETRY_BASE_DELAY", "0")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def test_batches_keep_input_order_after_retry():
+    client = FakeClient(throttled=1)
+    service = CohereEmbeddingService(client)
+
+    embeddings = asyncio.run(service.embed_texts(["a", "bb", "ccc", "dddd", "eeeee"]))
+
+    assert embeddings == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert sorted(len(batch) for batch in client.calls) == [1, 2, 2, 2]
+
+
+def test_permanent_failure_cancels_other_batches():
+    client = FakeClient(delay=10)
+    service = CohereEmbeddingService(client)
+
+    async def run():
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(service.embed_texts(["a", "b", "gagal", "c", "d", "e"]), 1)
+        # Sudah dibatalkan saat error sampai ke caller, bukan saat event loop ditutup
+        return client.cancelled
+
+    assert asyncio.run(run()) == 2
+    assert len(client.calls) == 3
@@ -0,0 +1,120 @@
+"""Test `fuse`: RRF, CombSUM dan normalized weighted fusion."""
+
+from uuid import uuid4
+
+import pytest
+
+from app.domain.entities.chunk import Chunk
+from app.domain.interfaces.retriever_service import RetrievalResult
+from app.infrastructure.retriever.fusion import fuse
+
+
+def _chunks(n: int) -> list[Chunk]:
+    document_id = uuid4()
+    return [
+        Chunk(document_id=document_id, content=f"chunk {i}", chunk_index=i, content_hash=f"h{i}")
+        for i in range(n)
+    ]
+
+
+def _ranked(chunks: list[Chunk], scores: list[float], source: str) -> list[RetrievalResult]:
+    return [RetrievalResult(chunk=c, score=s, source=source) for c, s in zip(chunks, scores)]
+
+
+def _ids(results: list[RetrievalResult], chunks: list[Chunk]) -> list[int]:
+    return [chunks.index(r.chunk) for r in results]
+
+
+def test_rrf_sums_reciprocal_ranks():
+    a, b, c = chunks = _chunks(3)
+    bm25 = _ranked([a, b], [9.0, 1.0], "bm25")
+    vector = _ranked([b, c], [0.9, 0.8], "vector")
+
+    results = fuse([bm25, vector], method="rrf", rrf_k=60)
+
+    assert _ids(results, chunks) == [1, 0, 2]
+    assert results[0].score == pytest.approx(1 / 62 + 1 / 61)
+    assert results[1].score == pytest.approx(1 / 61)
+    assert results[2].score == pytest.approx(1 / 62)
+    assert {r.source for r in results} == {"hybrid"}
+
+
+def test_ties_go_to_the_chunk_seen_first():
+    a, b, c, d = chunks = _chunks(4)
+    # a dan c sama-sama rank 1, b dan d sama-sama rank 2
+    results = fuse([_ranked([a, b], [1, 1], "bm25"), _ranked([c, d], [1, 1], "vector")])
+
+    assert _ids(results, chunks) == [0, 2, 1, 3]
+
+
+def test_weights_scale_each_list():
+    a, b = chunks = _chunks(2)
+    bm25 = _ranked([a, b], [1, 1], "bm25")
+    vector = _ranked([b, a], [1, 1], "vector")
+
+    assert _ids(fuse([bm25, vector], weights=[1.0, 3.0]), chunks) == [1, 0]
+    assert _ids(fuse([bm25, vector], weights=[3.0, 1.0]), chunks) == [0, 1]
+    # weight 0 = list diabaikan
+    assert _ids(fuse([bm25, vector], weights=[0.0, 1.0]), chunks) == [1, 0]
+
+
+def test_combsum_adds_raw_weighted_scores():
+    a, b, c = chunks = _chunks(3)
+    bm25 = _ranked([a, b, c], [4.0, 2.0, 1.0], "bm25")
+    vector = _ranked([c], [0.5], "vector")
+
+    results = fuse([bm25, vector], weights=[1.0, 10.0], method="combsum")
+
+    assert _ids(results, chunks) == [2, 0, 1]
+    assert [r.score for r in results] == pytest.approx([6.0, 4.0, 2.0])
+
+
+def test_normalized_uses_min_max_per_list():
+    a, b, c = chunks = _chunks(3)
+    bm25 = _ranked([a, b, c], [30.0, 20.0, 10.0], "bm25")
+    vector = _ranked([c, a], [0.9, 0.7], "vector")
+
+    results = fuse([bm25, vector], method="normalized")
+
+    # bm25 -> [1, 0.5, 0], vector -> [1, 0]
+    assert _ids(results, chunks) == [0, 2, 1]
+    assert [r.score for r in results] == pytest.approx([1.0, 1.0, 0.5])
+
+
+def test_normalized_list_with_equal_scores_counts_as_one():
+    a, b = chunks = _chunks(2)
+
+    results = fuse([_ranked([a, b], [0.3, 0.3], "vector")], method="normalized")
+
+    assert [r.score for r in results] == [1.0, 1.0]
+    assert _ids(results, chunks) == [0, 1]
+
+
+def test_lists_of_different_lengths_and_top_k():
+    chunks = _chunks(6)
+    long = _ranked(chunks, [6, 5, 4, 3, 2, 1], "bm25")
+    short = _ranked(chunks[5:], [1.0], "vector")
+
+    results = fuse([long, short], top_k=3)
+
+    # chunk 5 rank 6 di list panjang + rank 1 di list pendek
+    assert _ids(results, chunks) == [5, 0, 1]
+
+
+def test_empty_branch_is_ignored():
+    a, b = chunks = _chunks(2)
+    bm25 = _ranked([a, b], [2.0, 1.0], "bm25")
+
+    for method in ("rrf", "combsum", "normalized"):
+        assert _ids(fuse([bm25, []], method=method), chunks) == [0, 1]
+    assert fuse([[], []]) == []
+    assert fuse([]) == []
+
+
+def test_invalid_arguments():
+    bm25 = _ranked(_chunks(1), [1.0], "bm25")
+
+    with pytest.raises(ValueError):
+        fuse([bm25], weights=[1.0, 2.0])
+    with pytest.raises(ValueError):
+        fuse([bm25], method="borda")
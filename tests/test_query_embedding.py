@@ -0,0 +1,176 @@
+"""Test decorator embedding query: coalescing dan cache (LRU + Redis)."""
+
+import asyncio
+import base64
+
+import numpy as np
+import pytest
+
+from app.domain.interfaces.embedding_service import IEmbeddingService
+from app.infrastructure.embedding.cached_embedding import CachedEmbeddingService
+from app.infrastructure.embedding.coalescing_embedding import CoalescingEmbeddingService
+
+
+class CountingEmbeddingService(IEmbeddingService):
+    """Embedding = [panjang teks, 0.5]; mencatat setiap batch `embed_queries`."""
+
+    def __init__(self, delay: float = 0.0, error: Exception | None = None) -> None:
+        self.calls: list[list[str]] = []
+        self.started = asyncio.Event()
+        self._delay = delay
+        self._error = error
+
+    @property
+    def embedding_dimension(self) -> int:
+        return 2
+
+    async def embed_text(self, text: str) -> list[float]:
+        return (await self.embed_texts([text]))[0]
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(t)), 0.5] for t in texts]
+
+    async def embed_query(self, query: str) -> list[float]:
+        return (await self.embed_queries([query]))[0]
+
+    async def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        self.calls.append(list(queries))
+        self.started.set()
+        await asyncio.sleep(self._delay)
+        if self._error is not None:
+            raise self._error
+        return await self.embed_texts(queries)
+
+
+class DictCache:
+    def __init__(self) -> None:
+        self.data: dict[str, object] = {}
+
+    async def get(self, key: str) -> object | None:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: object, ttl: int | None = None) -> bool:
+        self.data[key] = value
+        return True
+
+
+def test_coalescing_batches_queries_in_one_window():
+    async def run():
+        inner = CountingEmbeddingService()
+        service = CoalescingEmbeddingService(inner, window=0.01)
+        results = await asyncio.gather(*(service.embed_query(q) for q in ["a", "bb", "ccc"]))
+        return inner, results
+
+    inner, results = asyncio.run(run())
+    assert inner.calls == [["a", "bb", "ccc"]]
+    assert results == [[1.0, 0.5], [2.0, 0.5], [3.0, 0.5]]
+
+
+def test_coalescing_flushes_at_max_batch():
+    async def run():
+        inner = CountingEmbeddingService()
+        service = CoalescingEmbeddingService(inner, window=10, max_batch=2)
+        await asyncio.wait_for(
+            asyncio.gather(service.embed_query("a"), service.embed_query("b")), timeout=1
+        )
+        return inner
+
+    assert asyncio.run(run()).calls == [["a", "b"]]
+
+
+def test_coalescing_deduplicates_pending_and_in_flight():
+    async def run():
+        inner = CountingEmbeddingService(delay=0.05)
+        service = CoalescingEmbeddingService(inner, window=0.001)
+        first = asyncio.ensure_future(service.embed_queries(["a", "a"]))
+        await inner.started.wait()
+        # Query yang sama saat batch sedang di-embed memakai future yang sama
+        second = await service.embed_query("a")
+        return inner, await first, second
+
+    inner, first, second = asyncio.run(run())
+    assert inner.calls == [["a"]]
+    assert first == [[1.0, 0.5], [1.0, 0.5]]
+    assert second == [1.0, 0.5]
+
+
+def test_coalescing_cancelled_caller_does_not_cancel_others():
+    async def run():
+        inner = CountingEmbeddingService(delay=0.05)
+        service = CoalescingEmbeddingService(inner, window=0.001)
+        cancelled = asyncio.ensure_future(service.embed_query("a"))
+        other = asyncio.ensure_future(service.embed_query("a"))
+        await inner.started.wait()
+        cancelled.cancel()
+        return inner, await other, cancelled
+
+    inner, result, cancelled = asyncio.run(run())
+    assert cancelled.cancelled()
+    assert result == [1.0, 0.5]
+    assert inner.calls == [["a"]]
+
+
+def test_coalescing_error_reaches_every_caller():
+    async def run():
+        inner = CountingEmbeddingService(error=RuntimeError("provider down"))
+        service = CoalescingEmbeddingService(inner, window=0.001)
+        return await asyncio.gather(
+            service.embed_query("a"), service.embed_query("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cache_round_trip_through_redis_as_base64_float32():
+    async def run():
+        cache = DictCache()
+        inner = CountingEmbeddingService()
+        first = await CachedEmbeddingService(inner, cache, model="m").embed_query("abc")
+        # Service baru (LRU kosong) dengan cache yang sama: hit dari Redis
+        second = await CachedEmbeddingService(inner, cache, model="m").embed_query("abc")
+        return cache, inner, first, second
+
+    cache, inner, first, second = asyncio.run(run())
+    assert inner.calls == [["abc"]]
+    assert first == second == [3.0, 0.5]
+    (value,) = cache.data.values()
+    assert np.frombuffer(base64.b64decode(value), dtype="<f4").tolist() == [3.0, 0.5]
+
+
+def test_cache_key_is_normalized_but_original_text_is_embedded():
+    async def run():
+        inner = CountingEmbeddingService()
+        service = CachedEmbeddingService(inner, None, model="m")
+        results = await service.embed_queries(["Kucing  Hitam", "kucing hitam"])
+        results.append(await service.embed_query("KUCING HITAM"))
+        return inner, results
+
+    inner, results = asyncio.run(run())
+    assert inner.calls == [["Kucing  Hitam"]]
+    assert results == [[13.0, 0.5]] * 3
+
+
+@pytest.mark.parametrize("value", ["bukan base64!", base64.b64encode(b"\x00" * 4).decode()])
+def test_cache_ignores_invalid_redis_value(value):
+    async def run():
+        cache = DictCache()
+        inner = CountingEmbeddingService()
+        service = CachedEmbeddingService(inner, cache, model="m")
+        cache.data[service._key("abc")] = value
+        return inner, await service.embed_query("abc")
+
+    inner, result = asyncio.run(run())
+    assert inner.calls == [["abc"]]
+    assert result == [3.0, 0.5]
+
+
+def test_cache_key_depends_on_model():
+    async def run():
+        cache = DictCache()
+        inner = CountingEmbeddingService()
+        await CachedEmbeddingService(inner, cache, model="local:2").embed_query("abc")
+        await CachedEmbeddingService(inner, cache, model="embed-v3").embed_query("abc")
+        return inner
+
+    assert len(asyncio.run(run()).calls) == 2